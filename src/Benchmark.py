@@ -0,0 +1,262 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import selectors
+import socket
+import sys
+import threading
+from datetime import datetime
+from threading import Event, Lock, Thread
+from time import monotonic, sleep, time
+
+from MonitorService import MonitorService
+
+
+# Loopback listeners accepting and dropping connections on one selector thread, plus ports that refuse.
+# Listeners that are taken down start refusing from that moment on.
+class LoopbackFarm:
+
+    def __init__(self, listeners, refusing):
+        self.selector = selectors.DefaultSelector()
+        self.sockets = {}  # port: listening socket
+        for _ in range(listeners):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(('127.0.0.1', 0))
+            sock.listen(1024)
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ)
+            self.sockets[sock.getsockname()[1]] = sock
+        self.refusing_ports = [_free_port() for _ in range(refusing)]
+        self.lock = Lock()
+        self.stopped = Event()
+        self.thread = Thread(target=self.__run, daemon=True, name="benchmark-farm")
+        self.thread.start()
+
+    @property
+    def listening_ports(self):
+        return list(self.sockets)
+
+    # Closes the listener; returns the wall-clock time it went down
+    def take_down(self, port):
+        with self.lock:
+            sock = self.sockets.pop(port)
+            self.selector.unregister(sock)
+            sock.close()
+        return time()
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+        for sock in self.sockets.values():
+            sock.close()
+        self.selector.close()
+
+    def __run(self):
+        while not self.stopped.is_set():
+            with self.lock:
+                events = self.selector.select(timeout=0.05)
+                for key, _ in events:
+                    try:
+                        connection, _ = key.fileobj.accept()
+                        connection.close()
+                    except OSError:
+                        pass
+
+
+# Plugged in as the monitor's status_history: counts every applied probe result
+class _ProbeCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def record(self, key, is_up, timestamp=None):
+        self.count += 1
+
+
+# Samples thread count and resident memory in the background
+class _ResourceSampler:
+
+    def __init__(self, interval=0.1):
+        self.interval = interval
+        self.peak_threads = threading.active_count()
+        self.peak_rss = _rss_bytes()
+        self.stopped = Event()
+        self.thread = Thread(target=self.__run, daemon=True, name="benchmark-sampler")
+        self.thread.start()
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def __run(self):
+        while not self.stopped.wait(self.interval):
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            self.peak_rss = max(self.peak_rss, _rss_bytes())
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # ru_maxrss is the peak, in kilobytes on Linux and bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _percentiles(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    pick = lambda fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+    return {'count': len(ordered), 'min': ordered[0], 'p50': pick(0.5), 'p90': pick(0.9), 'p99': pick(0.99),
+            'max': ordered[-1]}
+
+
+# Drives a start=False monitor through its public tick() every `interval` seconds on one thread, recording
+# when each tick started and how long it took. Ticking more often than MonitorService.TICK_INTERVAL keeps
+# results applied as they arrive, like the monitor's own loop does between ticks.
+class _TickDriver:
+
+    def __init__(self, monitor, interval):
+        self.monitor = monitor
+        self.interval = interval
+        self.starts, self.durations = [], []
+        self.stopped = Event()
+        self.thread = Thread(target=self.__run, daemon=True, name="benchmark-ticks")
+        self.thread.start()
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+        self.monitor.close()
+
+    def __run(self):
+        deadline = monotonic()
+        while not self.stopped.is_set():
+            start = monotonic()
+            self.starts.append(start)
+            self.monitor.tick()
+            self.durations.append(monotonic() - start)
+            deadline = max(deadline + self.interval, monotonic())
+            self.stopped.wait(deadline - monotonic())
+
+
+def run_scenario(listeners, refusing, subscribers, args):
+    farm = LoopbackFarm(listeners, refusing)
+    sampler = _ResourceSampler()
+    counter = _ProbeCounter()
+    monitor = MonitorService(args.grace_time, use_asyncio=args.use_asyncio, max_concurrency=args.max_concurrency,
+                             max_workers=args.max_workers, status_history=counter, start=False)
+
+    # Status change to notification latency for the listeners taken down, taken when the notification is delivered
+    down_at, latencies = {}, {}
+
+    def on_notification(callerId, entry):
+        key = (entry.host, entry.port)
+        if not entry.is_up and key in down_at and key not in latencies:
+            latencies[key] = time() - down_at[key]
+
+    monitor.logs.add_listener(on_notification)
+
+    services = [('127.0.0.1', port) for port in farm.listening_ports + farm.refusing_ports]
+    callers = [(f"Benchmark caller {i}", f"bench{i}") for i in range(subscribers)]
+    setup_start = monotonic()
+    monitor.register_services(services)
+    monitor.register_callers(callers)
+    monitor.subscribe_services([(callerId, host, port, args.polling_frequency)
+                                for _, callerId in callers for host, port in services])
+    setup_seconds = monotonic() - setup_start
+
+    ticks = _TickDriver(monitor, args.tick_interval)
+    sleep(args.warmup)
+    probes_before, ticks_before, measure_start = counter.count, len(ticks.starts), monotonic()
+    sleep(args.duration)
+    probes, measured, ticks_after = counter.count - probes_before, monotonic() - measure_start, len(ticks.starts)
+    tick_window = ticks.starts[max(0, ticks_before - 1):ticks_after]
+    tick_intervals = [later - earlier for earlier, later in zip(tick_window, tick_window[1:])]
+    tick_durations = ticks.durations[ticks_before:ticks_after]
+
+    toggled = farm.listening_ports[:min(args.toggle, listeners)]
+    for port in toggled:
+        down_at[('127.0.0.1', port)] = farm.take_down(port)
+    deadline = monotonic() + args.notification_timeout
+    while len(latencies) < len(toggled) and monotonic() < deadline:
+        sleep(0.05)
+
+    ticks.close()
+    sampler.close()
+    farm.close()
+
+    return {
+        'listeners': listeners,
+        'refusing': refusing,
+        'subscribers': subscribers,
+        'subscriptions': subscribers * len(services),
+        'setup_seconds': setup_seconds,
+        'probes': probes,
+        'probes_per_second': probes / measured if measured else 0.0,
+        'tick_interval_seconds': _percentiles(tick_intervals),
+        'tick_seconds': _percentiles(tick_durations),
+        'tick_overruns': sum(duration > args.tick_interval for duration in tick_durations),
+        'notification_latency_seconds': _percentiles(list(latencies.values())),
+        'notifications_missed': len(toggled) - len(latencies),
+        'peak_threads': sampler.peak_threads,
+        'peak_rss_bytes': sampler.peak_rss,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark MonitorService against loopback listeners")
+    parser.add_argument('--listeners', type=int, nargs='+', default=[100], help="listening ports per scenario")
+    parser.add_argument('--refusing', type=int, default=20, help="ports that refuse connections")
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[1, 10, 100],
+                        help="callers subscribed to every service, one scenario each")
+    parser.add_argument('--polling-frequency', type=float, default=1)
+    parser.add_argument('--grace-time', type=float, default=1)
+    parser.add_argument('--use-asyncio', action='store_true')
+    parser.add_argument('--max-workers', type=int, default=32)
+    parser.add_argument('--max-concurrency', type=int, default=1000)
+    parser.add_argument('--tick-interval', type=float, default=0.1, help="seconds between monitor ticks")
+    parser.add_argument('--warmup', type=float, default=3, help="seconds before measuring")
+    parser.add_argument('--duration', type=float, default=10, help="seconds measured")
+    parser.add_argument('--toggle', type=int, default=10, help="listeners taken down to measure notification latency")
+    parser.add_argument('--notification-timeout', type=float, default=10)
+    parser.add_argument('--output', default='benchmark.json')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.getLogger().setLevel(logging.WARNING)
+    results = {
+        'started_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': vars(args),
+        'scenarios': [],
+    }
+    for listeners in args.listeners:
+        for subscribers in args.subscribers:
+            scenario = run_scenario(listeners, args.refusing, subscribers, args)
+            results['scenarios'].append(scenario)
+            print(f"{listeners} listeners, {subscribers} subscribers: {scenario['probes_per_second']:.1f} probes/s, "
+                  f"p99 notification latency {(scenario['notification_latency_seconds'] or {}).get('p99')}")
+
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
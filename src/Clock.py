@@ -0,0 +1,62 @@
+from datetime import datetime
+from math import ceil
+from threading import Condition
+from time import monotonic, sleep, time
+
+
+# Time source for ConfigService and MonitorService: monotonic seconds for scheduling, epoch seconds for
+# timestamps and datetimes for grace time and outage windows. RealClock reads the system clocks.
+class RealClock:
+
+    def monotonic(self):
+        return monotonic()
+
+    def time(self):
+        return time()
+
+    def now(self):
+        return datetime.now()
+
+    def sleep(self, seconds):
+        sleep(seconds)
+
+    # Fixed-rate schedule: deadlines are whole intervals apart from the first one, however long each tick
+    # ran, so the loop does not drift. Ticks that were missed altogether are skipped rather than replayed.
+    def next_deadline(self, deadline, interval):
+        deadline += interval
+        now = self.monotonic()
+        if deadline <= now:
+            deadline += ceil((now - deadline) / interval) * interval
+            if deadline <= now:
+                deadline += interval
+        return deadline
+
+
+# Simulated time that only moves when advance() is called, for deterministic runs that replay hours or
+# days of behaviour in seconds. Meant for a MonitorService created with start=False and driven by tick().
+class VirtualClock(RealClock):
+
+    def __init__(self, start=None):
+        self._epoch = (start or datetime.now()).timestamp()
+        self._elapsed = 0.0
+        self._condition = Condition()
+
+    def monotonic(self):
+        return self._elapsed
+
+    def time(self):
+        return self._epoch + self._elapsed
+
+    def now(self):
+        return datetime.fromtimestamp(self.time())
+
+    def advance(self, seconds):
+        with self._condition:
+            self._elapsed += seconds
+            self._condition.notify_all()
+
+    # Blocks until another thread has advanced the clock far enough
+    def sleep(self, seconds):
+        with self._condition:
+            target = self._elapsed + seconds
+            self._condition.wait_for(lambda: self._elapsed >= target)
@@ -1,62 +1,172 @@
 import logging
-from threading import Lock
 from datetime import datetime, timedelta
-
 from models.Service import Service
 from models.Caller import Caller
+from Clock import RealClock
+from ConfigStore import ConfigStore
+from Metrics import FAST_BUCKETS, MetricsRegistry, TimedLock
+from OutageCalendar import OutageCalendar
+from Registry import RegistrySnapshot, StripedLock
+from Scheduler import ServiceScheduler
 
+logger = logging.getLogger(__name__)
 
-class ConfigService:
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+class ConfigService:
     DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+    MIN_CHECK_INTERVAL = 1  # seconds
+    PLANNED_OUTAGE = 'planned'  # id of the window managed by set_outage_time
+    edge_triggered = False  # services keep a set of subscribers owed a status change only when True
 
-    def __init__(self, grace_time):
+    def __init__(self, grace_time, store=None, metrics=None, clock=None):
         self.grace_time = timedelta(seconds=grace_time)
-        self.lock = Lock()
+        self.clock = clock or RealClock()
+        self.store = store or ConfigStore()  # persistence backend, in-memory only by default
+        self.metrics = metrics or MetricsRegistry()
+        self.lock = TimedLock(  # serialises writers
+            self.metrics.histogram('config_lock_wait_seconds', 'Time spent waiting for ConfigService.lock',
+                                   buckets=FAST_BUCKETS),
+            self.metrics.histogram('config_lock_hold_seconds', 'Time ConfigService.lock is held', buckets=FAST_BUCKETS))
+        self.service_locks = StripedLock()  # guards per-service state shared with probe result handling
         self.services = {}
         self.callers = {}
-        logging.info(f"ConfigService initialized with grace time: {self.grace_time.total_seconds()} seconds")
+        self.snapshot = RegistrySnapshot.empty()  # lock-free read view of services and callers
+        self.scheduler = ServiceScheduler()  # (host, port) ordered by next due check
+        self.outages = OutageCalendar()  # planned outage windows of services and service groups
+        self.__load_from_store()
+        logger.info("ConfigService initialized with grace time: %s seconds", self.grace_time.total_seconds())
 
     def register_service(self, host, port):
         with self.lock:
-            if (host, port) not in self.services:
-                service = Service(host, port)
-                service.last_checked = datetime.now() - self.grace_time
-                self.services[(host, port)] = service
-                logging.info(f"Service registered: {host}:{port}")
+            if self.__add_service(host, port):
+                self.store.save_services([(host, port)])
+                self.__publish_snapshot(services=[(host, port)])
+                logger.info("Service registered: %s:%s", host, port)
             else:
-                logging.warning(f"Service already registered: {host}:{port}")
+                logger.warning("Service already registered: %s:%s", host, port)
+
+    # Registers every (host, port) under a single lock acquisition; returns one bool per item
+    def register_services(self, services):
+        with self.lock:
+            services = list(services)
+            results = [self.__add_service(host, port) for host, port in services]
+            added = [service for service, added in zip(services, results) if added]
+            self.store.save_services(added)
+            self.__publish_snapshot(services=added)
+        logger.info("Bulk service registration: %s registered, %s already registered", sum(results), len(results) - sum(results))
+        return results
 
     def unregister_service(self, host, port):
         with self.lock:
             if (host, port) in self.services:
                 service = self.services[(host, port)]
-                for subs in service.subscribers:
-                    subs.remove_subscription((host, port))
-                del self.services[(host, port)]
-                logging.info(f"Service unregistered: {host}:{port}")
+                with self.service_locks.lock_for((host, port)):
+                    for callerId in service.subscribers:
+                        self.callers[callerId].remove_subscription(host, port)
+                    del self.services[(host, port)]
+                    self.scheduler.remove((host, port))
+                self.outages.clear((host, port))
+                self.store.delete_service(host, port)
+                self.__publish_snapshot(services=[(host, port)])
+                logger.info("Service unregistered: %s:%s", host, port)
             else:
-                logging.warning(f"Attempted to unregister non-existing service: {host}:{port}")
+                logger.warning("Attempted to unregister non-existing service: %s:%s", host, port)
 
     def set_outage_time(self, host, port, start: datetime, end: datetime):
         with self.lock:
             if (host, port) in self.services:
                 service = self.services[(host, port)]
-                service.outage_start = start
-                service.outage_end = end
-                logging.info(f"Outage time set for service {host}:{port} from {start.strftime(ConfigService.DATE_FORMAT)} to {end.strftime(ConfigService.DATE_FORMAT)}")
+                with self.service_locks.lock_for((host, port)):
+                    service.outage_start = start
+                    service.outage_end = end
+                self.outages.add((host, port), start, end, window_id=ConfigService.PLANNED_OUTAGE)
+                self.store.save_outage(host, port, start, end)
+                self.__recheck([(host, port)])
+                logger.info("Outage time set for service %s:%s from %s to %s", host, port, start.strftime(ConfigService.DATE_FORMAT), end.strftime(ConfigService.DATE_FORMAT))
             else:
-                logging.warning(f"Attempted to set outage time for non-existing service: {host}:{port}")
+                logger.warning("Attempted to set outage time for non-existing service: %s:%s", host, port)
+
+    # Adds another outage window for the service, repeating every `every` (a timedelta) up to `until` if given.
+    # Returns the window id, or None when the service is not registered.
+    def add_outage_window(self, host, port, start: datetime, end: datetime, every: timedelta = None,
+                          until: datetime = None, window_id=None):
+        with self.lock:
+            if (host, port) not in self.services:
+                logger.warning("Attempted to add outage window for non-existing service: %s:%s", host, port)
+                return None
+            window_id = self.outages.add((host, port), start, end, every, until, window_id)
+            self.store.save_outage_window((host, port), window_id, start, end, every, until)
+            self.__recheck([(host, port)])
+            logger.info("Outage window %s added for service %s:%s from %s to %s%s", window_id, host, port, start.strftime(ConfigService.DATE_FORMAT), end.strftime(ConfigService.DATE_FORMAT), f" every {every}" if every else "")
+            return window_id
+
+    def remove_outage_window(self, host, port, window_id):
+        with self.lock:
+            removed = self.outages.remove((host, port), window_id)
+            if removed:
+                self.store.delete_outage_window((host, port), window_id)
+                self.__recheck([(host, port)])
+                logger.info("Outage window %s removed for service %s:%s", window_id, host, port)
+            else:
+                logger.warning("Attempted to remove non-existing outage window %s for service %s:%s", window_id, host, port)
+            return removed
+
+    # Group windows apply to every service added to the group with add_to_outage_group
+    def add_group_outage(self, group, start: datetime, end: datetime, every: timedelta = None, until: datetime = None,
+                         window_id=None):
+        with self.lock:
+            window_id = self.outages.add(group, start, end, every, until, window_id)
+            self.store.save_outage_window(group, window_id, start, end, every, until)
+            self.__recheck(self.outages.members(group))
+            logger.info("Outage window %s added for group %s from %s to %s%s", window_id, group, start.strftime(ConfigService.DATE_FORMAT), end.strftime(ConfigService.DATE_FORMAT), f" every {every}" if every else "")
+            return window_id
+
+    def remove_group_outage(self, group, window_id):
+        with self.lock:
+            removed = self.outages.remove(group, window_id)
+            if removed:
+                self.store.delete_outage_window(group, window_id)
+                self.__recheck(self.outages.members(group))
+                logger.info("Outage window %s removed for group %s", window_id, group)
+            return removed
+
+    def add_to_outage_group(self, group, host, port):
+        with self.lock:
+            if (host, port) not in self.services:
+                logger.warning("Attempted to add non-existing service %s:%s to outage group %s", host, port, group)
+                return False
+            self.outages.join_group(group, (host, port))
+            self.store.save_outage_group_member(group, host, port)
+            self.__recheck([(host, port)])
+            logger.info("Service %s:%s added to outage group %s", host, port, group)
+            return True
+
+    def remove_from_outage_group(self, group, host, port):
+        with self.lock:
+            self.outages.leave_group(group, (host, port))
+            self.store.delete_outage_group_member(group, host, port)
+            self.__recheck([(host, port)])
+            logger.info("Service %s:%s removed from outage group %s", host, port, group)
 
     def register_caller(self, name, callerId):
         with self.lock:
-            if callerId not in self.callers:
-                caller = Caller(name, callerId)
-                self.callers[callerId] = caller
-                logging.info(f"Caller registered: {name} with ID {callerId}")
+            if self.__add_caller(name, callerId):
+                self.store.save_callers([(name, callerId)])
+                self.__publish_snapshot(callers=[callerId])
+                logger.info("Caller registered: %s with ID %s", name, callerId)
             else:
-                logging.warning(f"Caller already registered with ID {callerId}")
+                logger.warning("Caller already registered with ID %s", callerId)
+
+    # Registers every (name, callerId) under a single lock acquisition; returns one bool per item
+    def register_callers(self, callers):
+        with self.lock:
+            callers = list(callers)
+            results = [self.__add_caller(name, callerId) for name, callerId in callers]
+            added = [caller for caller, added in zip(callers, results) if added]
+            self.store.save_callers(added)
+            self.__publish_snapshot(callers=[callerId for name, callerId in added])
+        logger.info("Bulk caller registration: %s registered, %s already registered", sum(results), len(results) - sum(results))
+        return results
 
     def unregister_caller(self, callerId):
         with self.lock:
@@ -64,35 +174,142 @@ class ConfigService:
                 caller = self.callers[callerId]
                 for host, port in caller.subscribed.keys():
                     service = self.services[(host, port)]
-                    service.remove_subscriber(callerId)
+                    with self.service_locks.lock_for((host, port)):
+                        service.remove_subscriber(callerId)
+                        self.__update_probe_interval(service)
                 del self.callers[callerId]
-                logging.info(f"Caller unregistered with ID {callerId}")
+                self.store.delete_caller(callerId)
+                self.__publish_snapshot(callers=[callerId])
+                logger.info("Caller unregistered with ID %s", callerId)
             else:
-                logging.warning(f"Attempted to unregister non-existing caller with ID {callerId}")
+                logger.warning("Attempted to unregister non-existing caller with ID %s", callerId)
 
     def subscribe_service(self, host, port, callerId, polling_frequency):
-        polling_frequency = timedelta(seconds=polling_frequency)
         with self.lock:
-            if (host, port) in self.services and callerId in self.callers:
-                caller = self.callers[callerId]
-                service = self.services[(host, port)]
-
-                caller.add_subscription(host, port, max(polling_frequency, self.grace_time))
-                service.add_subscriber(callerId)
-                logging.info(f"Caller {callerId} subscribed to service {host}:{port}")
+            if self.__add_subscription(host, port, callerId, polling_frequency):
+                self.__refresh_probe_intervals([(host, port)])
+                self.store.save_subscriptions([(callerId, host, port, polling_frequency)])
+                logger.info("Caller %s subscribed to service %s:%s", callerId, host, port)
                 return True
             else:
-                logging.warning(f"Subscription attempt failed for caller {callerId} to service {host}:{port}")
+                logger.warning("Subscription attempt failed for caller %s to service %s:%s", callerId, host, port)
                 return False
 
+    # Applies every (callerId, host, port, polling_frequency) under a single lock acquisition and refreshes
+    # each touched service's probe interval once; returns one bool per item
+    def subscribe_services(self, subscriptions):
+        with self.lock:
+            results = []
+            touched = set()
+            saved = []
+            for callerId, host, port, polling_frequency in subscriptions:
+                subscribed = self.__add_subscription(host, port, callerId, polling_frequency)
+                if subscribed:
+                    touched.add((host, port))
+                    saved.append((callerId, host, port, polling_frequency))
+                results.append(subscribed)
+            self.__refresh_probe_intervals(touched)
+            self.store.save_subscriptions(saved)
+        logger.info("Bulk subscription: %s subscribed, %s failed", sum(results), len(results) - sum(results))
+        return results
+
     def unsubscribe_service(self, host, port, callerId):
         with self.lock:
             if (host, port) in self.services and callerId in self.callers:
                 caller = self.callers[callerId]
                 service = self.services[(host, port)]
 
-                caller.remove_subscription(host, port)
-                service.remove_subscriber(callerId)
-                logging.info(f"Caller {callerId} unsubscribed from service {host}:{port}")
+                with self.service_locks.lock_for((host, port)):
+                    caller.remove_subscription(host, port)
+                    service.remove_subscriber(callerId)
+                    self.__update_probe_interval(service)
+                self.store.delete_subscription(callerId, host, port)
+                logger.info("Caller %s unsubscribed from service %s:%s", callerId, host, port)
             else:
-                logging.warning(f"Unsubscription attempt failed for caller {callerId} to service {host}:{port}")
+                logger.warning("Unsubscription attempt failed for caller %s to service %s:%s", callerId, host, port)
+
+    # Warm start: rebuild the in-memory registry and schedule from the store's bulk reads
+    def __load_from_store(self):
+        services, callers, subscriptions, outage_windows, outage_group_members = self.store.load()
+        if not (services or callers or subscriptions or outage_windows or outage_group_members):
+            return
+        with self.lock:
+            for host, port, outage_start, outage_end in services:
+                self.__add_service(host, port)
+                self.services[(host, port)].outage_start = outage_start
+                self.services[(host, port)].outage_end = outage_end
+                if outage_start and outage_end:
+                    self.outages.add((host, port), outage_start, outage_end, window_id=ConfigService.PLANNED_OUTAGE)
+            for owner, window_id, start, end, every, until in outage_windows:
+                self.outages.add(owner, start, end, every, until, window_id)
+            for group, host, port in outage_group_members:
+                self.outages.join_group(group, (host, port))
+            for name, callerId in callers:
+                self.__add_caller(name, callerId)
+            touched = {(host, port) for callerId, host, port, polling_frequency in subscriptions
+                       if self.__add_subscription(host, port, callerId, polling_frequency)}
+            self.__refresh_probe_intervals(touched)
+            self.__publish_snapshot(services=None, callers=None)
+        logger.info("ConfigService loaded %s services, %s callers, %s subscriptions and %s outage windows from store", len(services), len(callers), len(subscriptions), len(outage_windows))
+
+    # The helpers below must be called with self.lock held
+    def __add_service(self, host, port):
+        if (host, port) in self.services:
+            return False
+        self.services[(host, port)] = Service(host, port, self.edge_triggered)
+        return True
+
+    def __add_caller(self, name, callerId):
+        if callerId in self.callers:
+            return False
+        self.callers[callerId] = Caller(name, callerId)
+        return True
+
+    # Re-evaluate at once after an outage change: the next check either runs or is pushed past the outage window
+    def __recheck(self, keys):
+        now = self.clock.monotonic()
+        for key in keys:
+            service = self.services.get(key)
+            if service is not None and service.probe_interval is not None:
+                self.scheduler.schedule(key, now)
+
+    # Leaves the service's probe interval stale; refresh it with __refresh_probe_intervals
+    def __add_subscription(self, host, port, callerId, polling_frequency):
+        if (host, port) not in self.services or callerId not in self.callers:
+            return False
+        caller = self.callers[callerId]
+        service = self.services[(host, port)]
+        with self.service_locks.lock_for((host, port)):
+            subscription = caller.add_subscription(host, port, max(polling_frequency, self.grace_time.total_seconds()))
+            service.add_subscriber(callerId, subscription)
+        return True
+
+    # After subscriptions were added: new subscribers should hear about the service without waiting a
+    # whole probe interval, so the services are checked at the next tick
+    def __refresh_probe_intervals(self, keys):
+        now = self.clock.monotonic()
+        for key in keys:
+            with self.service_locks.lock_for(key):
+                self.__update_probe_interval(self.services[key], now)
+
+    # Probe a service as often as its most demanding subscriber polls, but never more often than
+    # once per second or once per grace window; pause probing while nobody is subscribed.
+    # The next check is due at `due`, or one interval after the last one by default.
+    # Must be called with self.lock and the service's lock held.
+    def __update_probe_interval(self, service, due=None):
+        frequencies = [subscription.polling_frequency for subscription in service.subscribers.values()]
+        if not frequencies:
+            service.probe_interval = None
+            self.scheduler.remove((service.host, service.port))
+            return
+
+        service.probe_interval = max(min(frequencies), self.grace_time.total_seconds(), ConfigService.MIN_CHECK_INTERVAL)
+        if due is None:
+            due = service.last_checked + service.probe_interval
+        self.scheduler.schedule((service.host, service.port), due)
+
+    # Copy-on-write: readers keep whichever snapshot they already hold. `services` and `callers` are the keys
+    # changed since the last snapshot (None for all of them); only those are copied. Must be called with
+    # self.lock held.
+    def __publish_snapshot(self, services=(), callers=()):
+        self.snapshot = RegistrySnapshot.publish(self.snapshot, self.services, self.callers, services, callers)
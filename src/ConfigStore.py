@@ -0,0 +1,199 @@
+import sqlite3
+from datetime import datetime, timedelta
+from threading import Lock
+
+
+# Persistence interface used by ConfigService. The base class keeps nothing, so a ConfigService
+# without a store behaves exactly as an in-memory registry. Every save/delete call is one transaction.
+class ConfigStore:
+
+    def load(self):
+        # Returns (services, callers, subscriptions, outage_windows, outage_group_members):
+        #   services: [(host, port, outage_start, outage_end)], callers: [(name, callerId)],
+        #   subscriptions: [(callerId, host, port, polling_frequency)],
+        #   outage_windows: [(owner, window_id, start, end, every, until)] where owner is (host, port) or a group,
+        #   outage_group_members: [(group, host, port)]
+        return [], [], [], [], []
+
+    def save_services(self, services):
+        pass
+
+    def delete_service(self, host, port):
+        pass
+
+    def save_outage(self, host, port, start, end):
+        pass
+
+    # Windows added with ConfigService.add_outage_window / add_group_outage; `every` is a timedelta or None
+    def save_outage_window(self, owner, window_id, start, end, every, until):
+        pass
+
+    def delete_outage_window(self, owner, window_id):
+        pass
+
+    def save_outage_group_member(self, group, host, port):
+        pass
+
+    def delete_outage_group_member(self, group, host, port):
+        pass
+
+    def save_callers(self, callers):
+        pass
+
+    def delete_caller(self, callerId):
+        pass
+
+    def save_subscriptions(self, subscriptions):
+        pass
+
+    def delete_subscription(self, callerId, host, port):
+        pass
+
+    def close(self):
+        pass
+
+
+class SqliteConfigStore(ConfigStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS services (
+            host TEXT NOT NULL,
+            port INTEGER NOT NULL,
+            outage_start TEXT,
+            outage_end TEXT,
+            PRIMARY KEY (host, port)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS callers (
+            callerId TEXT PRIMARY KEY,
+            name TEXT NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS subscriptions (
+            callerId TEXT NOT NULL,
+            host TEXT NOT NULL,
+            port INTEGER NOT NULL,
+            polling_frequency REAL NOT NULL,
+            PRIMARY KEY (callerId, host, port)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS subscriptions_by_service ON subscriptions (host, port);
+        CREATE TABLE IF NOT EXISTS service_outage_windows (
+            host TEXT NOT NULL,
+            port INTEGER NOT NULL,
+            window_id NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            every_seconds REAL,
+            until TEXT,
+            PRIMARY KEY (host, port, window_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS group_outage_windows (
+            outage_group TEXT NOT NULL,
+            window_id NOT NULL,
+            start_time TEXT NOT NULL,
+            end_time TEXT NOT NULL,
+            every_seconds REAL,
+            until TEXT,
+            PRIMARY KEY (outage_group, window_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS outage_group_members (
+            outage_group TEXT NOT NULL,
+            host TEXT NOT NULL,
+            port INTEGER NOT NULL,
+            PRIMARY KEY (outage_group, host, port)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SqliteConfigStore.SCHEMA)
+
+    def load(self):
+        with self.lock:
+            services = [(host, port, self.__to_datetime(start), self.__to_datetime(end))
+                        for host, port, start, end in self.connection.execute(
+                            "SELECT host, port, outage_start, outage_end FROM services")]
+            callers = self.connection.execute("SELECT name, callerId FROM callers").fetchall()
+            subscriptions = self.connection.execute(
+                "SELECT callerId, host, port, polling_frequency FROM subscriptions").fetchall()
+            windows = [((host, port), *row) for host, port, *row in self.connection.execute(
+                "SELECT host, port, window_id, start_time, end_time, every_seconds, until FROM service_outage_windows")]
+            windows += [(group, *row) for group, *row in self.connection.execute(
+                "SELECT outage_group, window_id, start_time, end_time, every_seconds, until FROM group_outage_windows")]
+            members = self.connection.execute("SELECT outage_group, host, port FROM outage_group_members").fetchall()
+        outage_windows = [(owner, window_id, datetime.fromisoformat(start), datetime.fromisoformat(end),
+                           timedelta(seconds=every) if every is not None else None, self.__to_datetime(until))
+                          for owner, window_id, start, end, every, until in windows]
+        return services, callers, subscriptions, outage_windows, members
+
+    def save_services(self, services):
+        self.__write_many("INSERT OR IGNORE INTO services (host, port) VALUES (?, ?)", services)
+
+    def delete_service(self, host, port):
+        self.__write_many("DELETE FROM subscriptions WHERE host = ? AND port = ?", [(host, port)],
+                          "DELETE FROM service_outage_windows WHERE host = ? AND port = ?",
+                          "DELETE FROM outage_group_members WHERE host = ? AND port = ?",
+                          "DELETE FROM services WHERE host = ? AND port = ?")
+
+    def save_outage(self, host, port, start, end):
+        self.__write_many("UPDATE services SET outage_start = ?, outage_end = ? WHERE host = ? AND port = ?",
+                          [(start.isoformat(), end.isoformat(), host, port)])
+
+    def save_outage_window(self, owner, window_id, start, end, every, until):
+        row = (window_id, start.isoformat(), end.isoformat(), every.total_seconds() if every is not None else None,
+               until.isoformat() if until is not None else None)
+        if isinstance(owner, tuple):
+            self.__write_many("INSERT OR REPLACE INTO service_outage_windows (host, port, window_id, start_time, "
+                              "end_time, every_seconds, until) VALUES (?, ?, ?, ?, ?, ?, ?)", [owner + row])
+        else:
+            self.__write_many("INSERT OR REPLACE INTO group_outage_windows (outage_group, window_id, start_time, "
+                              "end_time, every_seconds, until) VALUES (?, ?, ?, ?, ?, ?)", [(owner,) + row])
+
+    def delete_outage_window(self, owner, window_id):
+        if isinstance(owner, tuple):
+            self.__write_many("DELETE FROM service_outage_windows WHERE host = ? AND port = ? AND window_id = ?",
+                              [owner + (window_id,)])
+        else:
+            self.__write_many("DELETE FROM group_outage_windows WHERE outage_group = ? AND window_id = ?",
+                              [(owner, window_id)])
+
+    def save_outage_group_member(self, group, host, port):
+        self.__write_many("INSERT OR IGNORE INTO outage_group_members (outage_group, host, port) VALUES (?, ?, ?)",
+                          [(group, host, port)])
+
+    def delete_outage_group_member(self, group, host, port):
+        self.__write_many("DELETE FROM outage_group_members WHERE outage_group = ? AND host = ? AND port = ?",
+                          [(group, host, port)])
+
+    def save_callers(self, callers):
+        self.__write_many("INSERT OR REPLACE INTO callers (name, callerId) VALUES (?, ?)", callers)
+
+    def delete_caller(self, callerId):
+        self.__write_many("DELETE FROM subscriptions WHERE callerId = ?", [(callerId,)],
+                          "DELETE FROM callers WHERE callerId = ?")
+
+    def save_subscriptions(self, subscriptions):
+        self.__write_many("INSERT OR REPLACE INTO subscriptions (callerId, host, port, polling_frequency) "
+                          "VALUES (?, ?, ?, ?)", subscriptions)
+
+    def delete_subscription(self, callerId, host, port):
+        self.__write_many("DELETE FROM subscriptions WHERE callerId = ? AND host = ? AND port = ?",
+                          [(callerId, host, port)])
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    # Runs every statement over the same parameter rows inside one transaction
+    def __write_many(self, sql, rows, *more_sql):
+        rows = list(rows)
+        if not rows:
+            return
+        with self.lock, self.connection:
+            for statement in (sql,) + more_sql:
+                self.connection.executemany(statement, rows)
+
+    @staticmethod
+    def __to_datetime(value):
+        return datetime.fromisoformat(value) if value is not None else None
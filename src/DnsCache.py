@@ -0,0 +1,140 @@
+import ipaddress
+import logging
+import socket
+from queue import SimpleQueue
+from threading import Lock, Thread
+from time import monotonic
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ('addresses', 'error', 'expires', 'refresh_at', 'refreshing')
+
+    def __init__(self, addresses, error, expires, refresh_at):
+        self.addresses = addresses  # tuple of resolved IP addresses in getaddrinfo order, None when resolution failed
+        self.error = error  # socket.gaierror of a failed resolution (negative entry)
+        self.expires = expires  # monotonic seconds
+        self.refresh_at = refresh_at
+        self.refreshing = False
+
+
+# Caches hostname resolutions for the probes. Successful lookups live for `ttl` seconds, failures for
+# `negative_ttl`. An entry that is used after `refresh_ahead` of its lifetime has passed is re-resolved
+# on a background thread while callers keep getting the cached addresses, so a slow resolver never sits
+# on the probe path once a name has been seen. Every address of a name is kept (IPv6 and IPv4 alike), so
+# probes can fall back across them the way socket.create_connection() does.
+class DnsCache:
+
+    def __init__(self, ttl=60, negative_ttl=5, refresh_ahead=0.8, family=socket.AF_UNSPEC):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.refresh_ahead = refresh_ahead
+        self.family = family
+        self.lock = Lock()
+        self._entries = {}  # host: _Entry
+        self._refresh_queue = SimpleQueue()
+        self.thread = Thread(target=self.__run, daemon=True, name="dns-refresh")
+        self.thread.start()
+
+    # Returns the IP addresses of `host` as a tuple, resolving it (blocking) when it isn't cached or has expired.
+    # Raises socket.gaierror for names that failed to resolve, including cached failures.
+    def resolve(self, host):
+        if _is_ip_address(host):
+            return (host,)
+        entry = self.__lookup(host)
+        if entry is None:
+            entry = self.__resolve(host)
+        if entry.error is not None:
+            raise entry.error
+        return entry.addresses
+
+    # Non-blocking variant: the cached addresses, or None while the name is unknown, failed or expired.
+    # A miss queues a background resolution so the next call can hit.
+    def cached(self, host):
+        if _is_ip_address(host):
+            return (host,)
+        entry = self.__lookup(host)
+        if entry is None:
+            self.__schedule_refresh(host)
+            return None
+        return entry.addresses
+
+    # (address, port) identifying the probe target behind a service, None until its host is resolved.
+    # The address is normalized and IPv4 is preferred, so `localhost` resolving to ::1 first still shares
+    # its key with `127.0.0.1`.
+    def endpoint(self, host, port):
+        addresses = self.cached(host)
+        return (_canonical_address(addresses), port) if addresses else None
+
+    def invalidate(self, host):
+        with self.lock:
+            self._entries.pop(host, None)
+
+    def close(self):
+        self._refresh_queue.put(None)
+        self.thread.join()
+
+    def __lookup(self, host):
+        now = monotonic()
+        with self.lock:
+            entry = self._entries.get(host)
+            if entry is None or entry.expires <= now:
+                return None
+            if now >= entry.refresh_at and not entry.refreshing:
+                entry.refreshing = True
+                self._refresh_queue.put(host)
+            return entry
+
+    def __schedule_refresh(self, host):
+        with self.lock:
+            entry = self._entries.get(host)
+            if entry is not None and entry.refreshing:
+                return
+            if entry is None:
+                # Placeholder keeping concurrent misses from queueing the same name twice
+                entry = self._entries[host] = _Entry(None, None, 0, 0)
+            entry.refreshing = True
+        self._refresh_queue.put(host)
+
+    def __resolve(self, host):
+        try:
+            infos = socket.getaddrinfo(host, None, self.family, socket.SOCK_STREAM)
+            addresses, error, ttl = tuple(dict.fromkeys(info[4][0] for info in infos)), None, self.ttl
+        except socket.gaierror as exc:
+            addresses, error, ttl = None, exc, self.negative_ttl
+            logger.warning("DnsCache - could not resolve %s: %s", host, exc)
+        now = monotonic()
+        entry = _Entry(addresses, error, now + ttl, now + ttl * self.refresh_ahead)
+        with self.lock:
+            self._entries[host] = entry
+        return entry
+
+    def __run(self):
+        while True:
+            host = self._refresh_queue.get()
+            if host is None:
+                return
+            try:
+                self.__resolve(host)
+            except Exception as exc:
+                logger.error("DnsCache - refresh of %s failed: %s", host, exc)
+                with self.lock:
+                    self._entries.pop(host, None)
+
+
+def _is_ip_address(host):
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+# First IPv4 address (IPv4-mapped IPv6 included), else the first address, in its canonical text form
+def _canonical_address(addresses):
+    normalized = []
+    for address in addresses:
+        ip = ipaddress.ip_address(address.partition('%')[0])
+        normalized.append(ip.ipv4_mapped or ip if ip.version == 6 else ip)
+    return str(next((ip for ip in normalized if ip.version == 4), normalized[0]))
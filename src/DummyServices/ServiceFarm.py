@@ -0,0 +1,328 @@
+import argparse
+import errno
+import heapq
+import json
+import random
+import resource
+import selectors
+import socket
+import sys
+import threading
+from bisect import bisect_right
+from time import monotonic, sleep, time
+
+UP = 'up'  # accepts and answers at once
+DOWN = 'down'  # not listening: connections are refused
+SLOW = 'slow'  # accepts, answers after slow_delay seconds
+BLACKHOLE = 'blackhole'  # accept queue kept full: connection attempts hang until they time out
+STATES = (UP, DOWN, SLOW, BLACKHOLE)
+
+RESPONSE = b"HTTP/1.1 200 OK\r\nContent-Length: 13\r\n\r\nHello, world!"
+BLACKHOLE_FILLERS = 8  # at most this many connections are used to clog a blackholed port's accept queue
+
+
+def is_reachable(state):
+    return state in (UP, SLOW)
+
+
+# Scripted schedule: [(state, seconds), ...], played once or on repeat
+class ScriptedSchedule:
+
+    def __init__(self, steps, repeat=True):
+        self.steps = [(state, float(seconds)) for state, seconds in steps]
+        self.repeat = repeat
+        self.position = 0
+
+    # (state, seconds) of the next period, or None when a one-shot script has ended
+    def next(self):
+        if self.position >= len(self.steps):
+            if not self.repeat:
+                return None
+            self.position = 0
+        step = self.steps[self.position]
+        self.position += 1
+        return step
+
+
+# Randomised schedule: each period draws a state by weight and a duration between min and max seconds
+class RandomSchedule:
+
+    def __init__(self, weights, min_duration, max_duration, rng):
+        self.states = list(weights)
+        self.weights = [weights[state] for state in self.states]
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.rng = rng
+
+    def next(self):
+        return (self.rng.choices(self.states, self.weights)[0],
+                self.rng.uniform(self.min_duration, self.max_duration))
+
+
+class _Listener:
+    __slots__ = ('port', 'state', 'schedule', 'sock', 'fillers')
+
+    def __init__(self, port, schedule):
+        self.port = port
+        self.state = DOWN
+        self.schedule = schedule
+        self.sock = None
+        self.fillers = []  # client sockets clogging the accept queue while blackholed, the last may be connecting
+
+
+# Thousands of dummy services on one selector loop and one thread. Every port follows its own schedule
+# of up/down/slow/blackhole periods, and every state change is recorded as ground truth
+# (wall-clock timestamp, port, state) to score a monitor's detection latency and accuracy.
+class ServiceFarm:
+
+    def __init__(self, schedules, host='127.0.0.1', slow_delay=3.0, truth_path=None):
+        self.host = host
+        self.slow_delay = slow_delay
+        self.listeners = {port: _Listener(port, schedule) for port, schedule in schedules.items()}
+        self.transitions = []  # (timestamp, port, state)
+        self.truth_file = open(truth_path, 'a') if truth_path else None
+        self.selector = selectors.DefaultSelector()
+        self._timers = []  # heap of (monotonic due time, port) of schedule changes
+        self._slow = []  # heap of (monotonic due time, id, client socket) of delayed answers
+        self._stopped = threading.Event()
+        self.thread = None
+
+    @classmethod
+    def from_file(cls, path, truth_path=None):
+        with open(path) as config_file:
+            config = json.load(config_file)
+        rng = random.Random(config.get('seed'))
+        schedules = {}
+        for entry in config['services']:
+            for port in _parse_ports(entry):
+                if 'schedule' in entry:
+                    schedules[port] = ScriptedSchedule(entry['schedule'], entry.get('repeat', True))
+                else:
+                    spec = entry['random']
+                    schedules[port] = RandomSchedule(spec['states'], spec.get('min_duration', 5),
+                                                     spec.get('max_duration', 60), rng)
+        return cls(schedules, config.get('host', '127.0.0.1'), config.get('slow_delay', 3.0), truth_path)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True, name="service-farm")
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def state_of(self, port):
+        return self.listeners[port].state
+
+    def run(self):
+        _raise_file_limit(2 * len(self.listeners) + 64)
+        now = monotonic()
+        for listener in self.listeners.values():
+            self.__advance(listener, now)
+        print(f"ServiceFarm running {len(self.listeners)} services on {self.host}")
+
+        while not self._stopped.is_set():
+            now = monotonic()
+            while self._timers and self._timers[0][0] <= now:
+                _, port = heapq.heappop(self._timers)
+                self.__advance(self.listeners[port], now)
+            while self._slow and self._slow[0][0] <= now:
+                _, _, client = heapq.heappop(self._slow)
+                self.__answer(client)
+
+            wakeups = [heap[0][0] for heap in (self._timers, self._slow) if heap]
+            timeout = min(max(0.0, min(wakeups) - now), 0.5) if wakeups else 0.5
+            for key, _ in self.selector.select(timeout):
+                if key.fileobj is key.data.sock:
+                    self.__accept(key.data)
+                else:
+                    self.__filled(key.data, key.fileobj)
+
+        for listener in self.listeners.values():
+            self.__close(listener)
+        for _, _, client in self._slow:
+            client.close()
+        self.selector.close()
+        if self.truth_file is not None:
+            self.truth_file.close()
+
+    # Moves the listener into the next period of its schedule
+    def __advance(self, listener, now):
+        step = listener.schedule.next()
+        if step is None:
+            return
+        state, seconds = step
+        if state != listener.state:
+            self.__enter(listener, state)
+        heapq.heappush(self._timers, (now + seconds, listener.port))
+
+    def __enter(self, listener, state):
+        self.__close(listener)
+        try:
+            if state in (UP, SLOW):
+                listener.sock = self.__listen(listener.port, 1024)
+                self.selector.register(listener.sock, selectors.EVENT_READ, listener)
+            elif state == BLACKHOLE:
+                listener.sock = self.__listen(listener.port, 0)
+                self.__add_filler(listener)
+        except OSError as exc:
+            print(f"ServiceFarm - could not put {self.host}:{listener.port} {state}: {exc}")
+            self.__close(listener)
+            state = DOWN
+        listener.state = state
+        self.__record(listener.port, state)
+
+    def __listen(self, port, backlog):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, port))
+        sock.listen(backlog)
+        sock.setblocking(False)
+        return sock
+
+    def __close(self, listener):
+        if listener.sock is not None:
+            if listener.state in (UP, SLOW):
+                self.selector.unregister(listener.sock)
+            listener.sock.close()
+            listener.sock = None
+        for filler in listener.fillers:
+            try:
+                self.selector.unregister(filler)
+            except KeyError:
+                pass
+            filler.close()
+        listener.fillers = []
+
+    # Clogs a blackholed listener's accept queue (backlog 0) one non-blocking connect at a time: each
+    # filler that completes starts the next, until one stays pending because the queue is full and its
+    # SYNs are dropped. Nothing here waits, so switching thousands of ports never stalls the loop.
+    def __add_filler(self, listener):
+        filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        filler.setblocking(False)
+        listener.fillers.append(filler)
+        if filler.connect_ex((self.host, listener.port)) in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            self.selector.register(filler, selectors.EVENT_WRITE, listener)
+
+    def __filled(self, listener, filler):
+        self.selector.unregister(filler)
+        if filler.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0 and len(listener.fillers) < BLACKHOLE_FILLERS:
+            self.__add_filler(listener)
+
+    def __accept(self, listener):
+        try:
+            client, _ = listener.sock.accept()
+        except OSError:
+            return
+        if listener.state == SLOW:
+            heapq.heappush(self._slow, (monotonic() + self.slow_delay, id(client), client))
+        else:
+            self.__answer(client)
+
+    @staticmethod
+    def __answer(client):
+        try:
+            client.setblocking(False)
+            client.send(RESPONSE)
+        except OSError:
+            pass
+        finally:
+            client.close()
+
+    def __record(self, port, state):
+        transition = (time(), port, state)
+        self.transitions.append(transition)
+        if self.truth_file is not None:
+            self.truth_file.write(json.dumps({'timestamp': transition[0], 'host': self.host, 'port': port,
+                                              'state': state}) + '\n')
+            self.truth_file.flush()
+
+
+# Scores monitor observations [(timestamp, port, is_up)] against farm transitions [(timestamp, port, state)].
+# A change of reachability counts as detected by the first observation reporting it before the next change;
+# accuracy is the share of observations that match the true state at their timestamp.
+def score(transitions, observations, tolerance=0.0):
+    truth = {}  # port: ([timestamps], [reachable])
+    for timestamp, port, state in sorted(transitions):
+        times, reachable = truth.setdefault(port, ([], []))
+        if not reachable or reachable[-1] != is_reachable(state):
+            times.append(timestamp)
+            reachable.append(is_reachable(state))
+
+    by_port = {}
+    for timestamp, port, is_up in sorted(observations):
+        by_port.setdefault(port, []).append((timestamp, is_up))
+
+    latencies, missed, matching, judged = [], 0, 0, 0
+    for port, (times, reachable) in truth.items():
+        seen = by_port.get(port, [])
+        for i in range(1, len(times)):
+            end = times[i + 1] if i + 1 < len(times) else float('inf')
+            detection = next((timestamp for timestamp, is_up in seen
+                              if times[i] <= timestamp < end and is_up == reachable[i]), None)
+            if detection is None:
+                missed += 1
+            else:
+                latencies.append(detection - times[i])
+        for timestamp, is_up in seen:
+            index = bisect_right(times, timestamp - tolerance) - 1
+            if index >= 0:
+                judged += 1
+                matching += is_up == reachable[index]
+
+    latencies.sort()
+    return {
+        'changes': len(latencies) + missed,
+        'detected': len(latencies),
+        'missed': missed,
+        'latency_p50': latencies[len(latencies) // 2] if latencies else None,
+        'latency_p99': latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))] if latencies else None,
+        'latency_max': latencies[-1] if latencies else None,
+        'accuracy': matching / judged if judged else None,
+    }
+
+
+def load_transitions(path):
+    with open(path) as truth_file:
+        return [(record['timestamp'], record['port'], record['state']) for record in map(json.loads, truth_file)]
+
+
+def _parse_ports(entry):
+    if 'port' in entry:
+        return [int(entry['port'])]
+    ports = entry['ports']
+    if isinstance(ports, str):
+        first, _, last = ports.partition('-')
+        return list(range(int(first), int(last or first) + 1))
+    return [int(port) for port in ports]
+
+
+def _raise_file_limit(wanted):
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < wanted:
+        target = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError):
+            print(f"ServiceFarm - open file limit {soft} may be too low for {wanted} sockets", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a fleet of scripted dummy services on one selector loop")
+    parser.add_argument('config', help="JSON file with the services and their schedules")
+    parser.add_argument('--truth', help="JSON lines file receiving every state transition")
+    args = parser.parse_args(argv)
+
+    farm = ServiceFarm.from_file(args.config, args.truth).start()
+    try:
+        while farm.thread.is_alive():
+            sleep(1)
+    except KeyboardInterrupt:
+        print("\nStopping service farm...")
+    farm.stop()
+
+
+if __name__ == "__main__":
+    main()
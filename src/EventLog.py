@@ -0,0 +1,183 @@
+import mmap
+import os
+import struct
+from collections import namedtuple
+from functools import lru_cache
+from hashlib import blake2b
+from queue import Empty, SimpleQueue
+from threading import Event, Lock, Thread
+from time import monotonic
+
+# timestamp (epoch seconds), service id, latency (seconds), status, padded to 24 bytes
+RECORD = struct.Struct('<dQfB3x')
+SEGMENT_SUFFIX = '.seg'
+
+EventRecord = namedtuple('EventRecord', ['timestamp', 'service_id', 'is_up', 'latency'])
+
+
+# Stable 64-bit id of a host/port pair, identical across restarts and processes
+@lru_cache(maxsize=65536)
+def service_id(host, port):
+    return int.from_bytes(blake2b(f"{host}:{port}".encode(), digest_size=8).digest(), 'little')
+
+
+# Appends fixed-size probe records to numbered segment files in `directory`.
+# append() only queues the record: a writer thread buffers records and writes + fsyncs them at most every
+# `fsync_interval` seconds, so a slow disk never stalls the caller.
+# Timestamps are wall-clock, which can step backwards; they are clamped to never decrease within the log,
+# so readers can binary-search them.
+class EventLogWriter:
+
+    def __init__(self, directory, segment_size=64 * 1024 * 1024, fsync_interval=1.0):
+        self.directory = directory
+        self.records_per_segment = max(1, segment_size // RECORD.size)
+        self.fsync_interval = fsync_interval
+        self.lock = Lock()
+        self.closed = False
+        self._queue = SimpleQueue()  # (timestamp, service_id, is_up, latency), an Event to flush, or None to stop
+        self._buffer = bytearray()
+        self._last_sync = monotonic()
+        self._last_timestamp = float('-inf')
+        os.makedirs(directory, exist_ok=True)
+
+        segments = _list_segments(directory)
+        self._segment_number = _segment_number(segments[-1]) if segments else 0
+        self._file = None
+        self._records_in_segment = 0
+        self.__open_segment(self._segment_number)
+        self.thread = Thread(target=self.__run, daemon=True, name="event-log-writer")
+        self.thread.start()
+
+    def append(self, timestamp, service_id, is_up, latency):
+        self._queue.put((timestamp, service_id, is_up, latency))
+
+    # Blocks until everything appended so far is written and fsynced
+    def flush(self):
+        if self.closed:
+            return
+        written = Event()
+        self._queue.put(written)
+        written.wait()
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self._queue.put(None)
+        self.thread.join()
+
+    def __run(self):
+        while True:
+            timeout = max(0.0, self._last_sync + self.fsync_interval - monotonic()) if self._buffer else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except Empty:
+                self.__sync()
+                continue
+            if item is None:
+                self.__sync()
+                self._file.close()
+                return
+            if isinstance(item, Event):
+                self.__sync()
+                item.set()
+                continue
+            timestamp, record_service_id, is_up, latency = item
+            self._last_timestamp = max(timestamp, self._last_timestamp)
+            self._buffer += RECORD.pack(self._last_timestamp, record_service_id, latency, is_up)
+            if monotonic() - self._last_sync >= self.fsync_interval:
+                self.__sync()
+
+    def __sync(self):
+        offset = 0
+        while offset < len(self._buffer):
+            room = (self.records_per_segment - self._records_in_segment) * RECORD.size
+            if room == 0:
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self.__open_segment(self._segment_number + 1)
+                continue
+            chunk = self._buffer[offset:offset + room]
+            self._file.write(chunk)
+            self._records_in_segment += len(chunk) // RECORD.size
+            offset += len(chunk)
+        self._buffer.clear()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = monotonic()
+
+    def __open_segment(self, number):
+        self._segment_number = number
+        path = os.path.join(self.directory, f"{number:010d}{SEGMENT_SUFFIX}")
+        self._file = open(path, 'ab')
+        # A crash can leave a torn record at the end; new records start on the next record boundary
+        size = self._file.tell()
+        if size % RECORD.size:
+            self._file.truncate(size - size % RECORD.size)
+            self._file.seek(0, os.SEEK_END)
+        self._records_in_segment = self._file.tell() // RECORD.size
+        if self._records_in_segment:
+            with open(path, 'rb') as segment:
+                segment.seek(-RECORD.size, os.SEEK_END)
+                self._last_timestamp = max(self._last_timestamp, RECORD.unpack(segment.read(RECORD.size))[0])
+
+
+# Scans segments through mmap without loading them into the heap.
+# The writer keeps timestamps from decreasing within the log, so time ranges are located by binary search.
+class EventLogReader:
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def scan(self, start=None, end=None, host=None, port=None):
+        wanted = service_id(host, port) if host is not None else None
+        for path in _list_segments(self.directory):
+            with open(path, 'rb') as segment:
+                size = os.fstat(segment.fileno()).st_size
+                count = size // RECORD.size
+                if count == 0:
+                    continue
+                with mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    if end is not None and _timestamp_at(mapped, 0) > end:
+                        return
+                    if start is not None and _timestamp_at(mapped, count - 1) < start:
+                        continue
+                    first = _first_at_or_after(mapped, count, start) if start is not None else 0
+                    view = memoryview(mapped)[first * RECORD.size:count * RECORD.size]
+                    records = RECORD.iter_unpack(view)
+                    try:
+                        for timestamp, record_service_id, latency, is_up in records:
+                            if end is not None and timestamp > end:
+                                return
+                            if wanted is None or record_service_id == wanted:
+                                yield EventRecord(timestamp, record_service_id, bool(is_up), latency)
+                    finally:
+                        # The mmap can only close once nothing references its buffer
+                        del records
+                        view.release()
+
+
+def _list_segments(directory):
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+
+
+def _segment_number(path):
+    return int(os.path.basename(path)[:-len(SEGMENT_SUFFIX)])
+
+
+def _timestamp_at(mapped, index):
+    return RECORD.unpack_from(mapped, index * RECORD.size)[0]
+
+
+def _first_at_or_after(mapped, count, timestamp):
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if _timestamp_at(mapped, middle) < timestamp:
+            low = middle + 1
+        else:
+            high = middle
+    return low
@@ -0,0 +1,54 @@
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+# Turns raw probe results into confirmed service status changes.
+# A service only flips after `hysteresis` consecutive results that disagree with its current status.
+# With flap_threshold set, a service whose status changed that many times within flap_window seconds
+# is marked flapping (notifications suppressed, probing slowed by flap_backoff) until the change
+# rate falls to half the threshold.
+class FlapDetector:
+
+    def __init__(self, hysteresis=1, flap_threshold=None, flap_window=300, flap_backoff=4):
+        self.hysteresis = max(1, hysteresis)
+        self.flap_threshold = flap_threshold
+        self.flap_window = flap_window
+        self.flap_backoff = flap_backoff
+
+    # Applies one probe result to the service; returns True when its confirmed status changed
+    def observe(self, service, is_up, now):
+        changed = False
+        if is_up == service.is_up:
+            service.streak = 0
+        else:
+            service.streak += 1
+            if service.streak >= self.hysteresis:
+                service.is_up = is_up
+                service.streak = 0
+                changed = True
+
+        if self.flap_threshold:
+            self.__update_flapping(service, changed, now)
+        return changed
+
+    def probe_interval(self, service):
+        if service.probe_interval is None:
+            return None
+        return service.probe_interval * self.flap_backoff if service.flapping else service.probe_interval
+
+    def __update_flapping(self, service, changed, now):
+        if service.transitions is None:
+            service.transitions = deque(maxlen=self.flap_threshold)
+        if changed:
+            service.transitions.append(now)
+        while service.transitions and service.transitions[0] < now - self.flap_window:
+            service.transitions.popleft()
+
+        if not service.flapping and len(service.transitions) >= self.flap_threshold:
+            service.flapping = True
+            logger.warning("Service %s:%s is flapping, suppressing notifications", service.host, service.port)
+        elif service.flapping and len(service.transitions) <= self.flap_threshold // 2:
+            service.flapping = False
+            logger.info("Service %s:%s stopped flapping", service.host, service.port)
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from threading import Thread
+from urllib.parse import parse_qs, urlsplit
+
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           409: 'Conflict', 500: 'Internal Server Error'}
+
+logger = logging.getLogger(__name__)
+
+
+class HttpError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Minimal asyncio HTTP/1.1 front end for a MonitorService (or ShardedMonitorService).
+# ConfigService operations are JSON endpoints; notifications are pushed per caller over
+# Server-Sent Events or long-poll. Every connection is a coroutine on one event loop thread; the
+# ConfigService calls behind the JSON endpoints run in the loop's default executor.
+#
+#   GET    /services                                     -> [{host, port, is_up}]
+#   POST   /services            {host, port}             -> register_service
+#   DELETE /services            {host, port}             -> unregister_service
+#   POST   /services/outage     {host, port, start, end} -> set_outage_time (ISO 8601 datetimes)
+#   GET    /callers                                      -> [{name, callerId}]
+#   POST   /callers             {name, callerId}         -> register_caller
+#   DELETE /callers             {callerId}               -> unregister_caller
+#   POST   /subscriptions       {host, port, callerId, polling_frequency} -> subscribe_service
+#   DELETE /subscriptions       {host, port, callerId}   -> unsubscribe_service
+#   GET    /callers/<callerId>/logs?cursor=0&timeout=30  -> long-poll {entries, cursor}
+#   GET    /callers/<callerId>/stream?cursor=0           -> text/event-stream of notifications
+#   GET    /metrics                                      -> Prometheus text format of monitor_service.metrics
+class MonitorHttpApi:
+    KEEPALIVE_INTERVAL = 15  # seconds between SSE comments on an idle stream
+    MAX_LONG_POLL = 60  # seconds
+
+    def __init__(self, monitor_service, host='127.0.0.1', port=8000):
+        self.monitor_service = monitor_service
+        self.host = host
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        self._waiters = {}  # callerId: asyncio.Event set when the caller gets a new log entry
+        self.thread = Thread(target=self.loop.run_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.__start_server(), self.loop).result()
+        self.monitor_service.logs.add_listener(self.__on_notification)
+        logger.info("MonitorHttpApi listening on http://%s:%s", self.host, self.port)
+        return self
+
+    def stop(self):
+        if not self.thread.is_alive():
+            return
+        self.monitor_service.logs.remove_listener(self.__on_notification)
+        asyncio.run_coroutine_threadsafe(self.__stop_server(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+    async def __start_server(self):
+        self.server = await asyncio.start_server(self.__handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    # Open streams and long-polls never end on their own, and wait_closed() waits for every connection
+    # (Python 3.12.1+), so the handlers are cancelled first; each one closes its writer on the way out
+    async def __stop_server(self):
+        self.server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.server.wait_closed()
+
+    # Called on the monitor thread; hands the wake-up over to the event loop
+    def __on_notification(self, callerId, entry):
+        if callerId in self._waiters:
+            self.loop.call_soon_threadsafe(self.__wake, callerId)
+
+    def __wake(self, callerId):
+        waiter = self._waiters.pop(callerId, None)
+        if waiter is not None:
+            waiter.set()
+
+    # Take the waiter *before* reading the log, so an entry appended in between still wakes us up
+    def __waiter(self, callerId):
+        waiter = self._waiters.get(callerId)
+        if waiter is None:
+            waiter = self._waiters[callerId] = asyncio.Event()
+        return waiter
+
+    @staticmethod
+    async def __wait(waiter, timeout):
+        try:
+            await asyncio.wait_for(waiter.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def __handle_connection(self, reader, writer):
+        try:
+            method, target, body = await self.__read_request(reader)
+            url = urlsplit(target)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            parts = [part for part in url.path.split('/') if part]
+
+            if method == 'GET' and len(parts) == 3 and parts[0] == 'callers' and parts[2] == 'stream':
+                await self.__stream(writer, parts[1], int(query.get('cursor', 0)))
+                return
+            if method == 'GET' and parts == ['metrics'] and hasattr(self.monitor_service, 'metrics'):
+                await self.__write(writer, 200, 'text/plain; version=0.0.4; charset=utf-8',
+                                   self.monitor_service.metrics.render_prometheus().encode())
+                writer.close()
+                return
+            if method == 'GET' and len(parts) == 3 and parts[0] == 'callers' and parts[2] == 'logs':
+                status, payload = await self.__long_poll(parts[1], int(query.get('cursor', 0)),
+                                                         min(float(query.get('timeout', 30)), self.MAX_LONG_POLL))
+            else:
+                # Config calls take ConfigService.lock and may commit to SQLite: keep them off the event loop
+                status, payload = await self.loop.run_in_executor(None, self.__dispatch, method, parts, body)
+        except HttpError as error:
+            status, payload = error.status, {'error': str(error)}
+        except (ValueError, KeyError, TypeError) as error:
+            status, payload = 400, {'error': f"Invalid request: {error}"}
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            writer.close()
+            return
+        except Exception as error:
+            logger.error("MonitorHttpApi - ERROR: %s", error)
+            status, payload = 500, {'error': str(error)}
+
+        try:
+            await self.__write_json(writer, status, payload)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def __read_request(reader):
+        request_line = (await reader.readline()).decode('latin-1').strip()
+        if not request_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        method, target, _ = request_line.split(' ', 2)
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        body = json.loads(await reader.readexactly(length)) if length else {}
+        return method.upper(), target, body
+
+    async def __write_json(self, writer, status, payload):
+        await self.__write(writer, status, 'application/json', json.dumps(payload).encode())
+
+    @staticmethod
+    async def __write(writer, status, content_type, body):
+        writer.write((f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+                      f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body)
+        await writer.drain()
+
+    def __dispatch(self, method, parts, body):
+        monitor = self.monitor_service
+        route = (method, '/'.join(parts))
+
+        if route == ('GET', 'services'):
+            return 200, [{'host': host, 'port': port, 'is_up': self.__is_up((host, port))}
+                         for host, port in list(monitor.services)]
+        if route == ('POST', 'services'):
+            registered = monitor.register_services([(body['host'], int(body['port']))])[0]
+            return (201, {'registered': True}) if registered else (409, {'error': 'Service already registered'})
+        if route == ('DELETE', 'services'):
+            key = (body['host'], int(body['port']))
+            self.__require(key in monitor.services, 'Service not registered')
+            monitor.unregister_service(*key)
+            return 200, {'unregistered': True}
+        if route == ('POST', 'services/outage'):
+            key = (body['host'], int(body['port']))
+            self.__require(key in monitor.services, 'Service not registered')
+            monitor.set_outage_time(*key, datetime.fromisoformat(body['start']), datetime.fromisoformat(body['end']))
+            return 200, {'outage_set': True}
+        if route == ('GET', 'callers'):
+            return 200, [{'callerId': callerId, 'name': getattr(caller, 'name', caller)}
+                         for callerId, caller in list(monitor.callers.items())]
+        if route == ('POST', 'callers'):
+            registered = monitor.register_callers([(body['name'], body['callerId'])])[0]
+            return (201, {'registered': True}) if registered else (409, {'error': 'Caller already registered'})
+        if route == ('DELETE', 'callers'):
+            self.__require(body['callerId'] in monitor.callers, 'Caller not registered')
+            monitor.unregister_caller(body['callerId'])
+            return 200, {'unregistered': True}
+        if route == ('POST', 'subscriptions'):
+            subscribed = monitor.subscribe_service(body['host'], int(body['port']), body['callerId'],
+                                                   float(body['polling_frequency']))
+            self.__require(subscribed, 'Service or caller not registered')
+            return 201, {'subscribed': True}
+        if route == ('DELETE', 'subscriptions'):
+            key = (body['host'], int(body['port']))
+            self.__require(key in monitor.services and body['callerId'] in monitor.callers,
+                           'Service or caller not registered')
+            monitor.unsubscribe_service(*key, body['callerId'])
+            return 200, {'unsubscribed': True}
+        raise HttpError(404, f"No route for {method} /{'/'.join(parts)}")
+
+    def __is_up(self, key):
+        service = self.monitor_service.services.get(key)
+        if hasattr(service, 'is_up'):
+            return service.is_up
+        return getattr(self.monitor_service, 'statuses', {}).get(key)
+
+    @staticmethod
+    def __require(condition, message):
+        if not condition:
+            raise HttpError(404, message)
+
+    async def __long_poll(self, callerId, cursor, timeout):
+        waiter = self.__waiter(callerId)
+        entries, cursor = self.monitor_service.logs.read(callerId, cursor)
+        if not entries:
+            await self.__wait(waiter, timeout)
+            entries, cursor = self.monitor_service.logs.read(callerId, cursor)
+        return 200, {'entries': [self.__entry_json(entry) for entry in entries], 'cursor': cursor}
+
+    async def __stream(self, writer, callerId, cursor):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: close\r\n\r\n")
+        try:
+            while True:
+                waiter = self.__waiter(callerId)
+                entries, cursor = self.monitor_service.logs.read(callerId, cursor)
+                if entries:
+                    writer.write(''.join(f"id: {entry.seq}\ndata: {json.dumps(self.__entry_json(entry))}\n\n"
+                                         for entry in entries).encode())
+                else:
+                    writer.write(b": keepalive\n\n")
+                await writer.drain()
+                if not entries:
+                    await self.__wait(waiter, self.KEEPALIVE_INTERVAL)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def __entry_json(entry):
+        return {'seq': entry.seq, 'timestamp': entry.timestamp, 'host': entry.host, 'port': entry.port,
+                'is_up': entry.is_up}
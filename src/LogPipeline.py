@@ -0,0 +1,135 @@
+import atexit
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from threading import Lock
+from time import monotonic
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# LogRecord attributes that are not structured fields passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'suppressed'}
+
+
+# Token bucket per category: `rate` records per second with bursts of `burst`. The category is the
+# record's `category` attribute (logger.info(..., extra={'category': ...})) or else its logger name.
+# Errors always pass; the first record let through after drops carries the count in `suppressed`.
+class RateLimitFilter(logging.Filter):
+
+    def __init__(self, rate=50, burst=200):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.lock = Lock()
+        self._buckets = {}  # category: [tokens, monotonic time of last refill, records suppressed]
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        category = getattr(record, 'category', record.name)
+        now = monotonic()
+        with self.lock:
+            bucket = self._buckets.get(category)
+            if bucket is None:
+                bucket = self._buckets[category] = [self.burst, now, 0]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                bucket[2] += 1
+                return False
+            bucket[0] = tokens - 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+# Puts records on the queue as they are: the message is only formatted by the listener thread.
+# Arguments are therefore rendered after the call returns, so pass values that won't change afterwards.
+class DeferredQueueHandler(QueueHandler):
+
+    def prepare(self, record):
+        return record
+
+
+# QueueListener whose stop() may be called more than once: by its owner and again at exit
+class LogListener(QueueListener):
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+class TextFormatter(logging.Formatter):
+
+    def format(self, record):
+        message = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        return f"{message} ({suppressed} similar messages suppressed)" if suppressed else message
+
+
+# One JSON object per record: the rendered message, its template and arguments, and any `extra` fields
+class StructuredFormatter(logging.Formatter):
+
+    def format(self, record):
+        payload = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'template': record.msg if isinstance(record.msg, str) else str(record.msg),
+        }
+        if record.args:
+            payload['args'] = record.args if isinstance(record.args, (tuple, list)) else [record.args]
+        payload.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if getattr(record, 'suppressed', 0):
+            payload['suppressed'] = record.suppressed
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+# Routes all logging through a queue: callers only build a LogRecord and enqueue it, while a background
+# QueueListener formats it and writes it to `handlers` (stderr by default). Replaces the root logger's
+# handlers and returns the started listener; it is stopped, flushing what is queued, at exit.
+def configure_logging(level=logging.INFO, structured=False, rate=50, burst=200, handlers=None):
+    formatter = StructuredFormatter() if structured else TextFormatter(TEXT_FORMAT)
+    handlers = list(handlers) if handlers else [logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue = SimpleQueue()
+    queue_handler = DeferredQueueHandler(queue)
+    if rate is not None:
+        queue_handler.addFilter(RateLimitFilter(rate, burst))
+    listener = LogListener(queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+# Child process side: drops the root handlers inherited from a forked parent, whose listener thread does not
+# exist in the child, and sends every record to `queue` (a multiprocessing.Queue) for the parent to write
+def forward_logging(queue, level=logging.INFO):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(queue))
+    root.setLevel(level)
+
+
+# Parent side: handles records forwarded by child processes with the parent's own logging configuration
+class ForwardedRecordHandler(logging.Handler):
+
+    def emit(self, record):
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
@@ -0,0 +1,252 @@
+import logging
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import monotonic
+
+# Upper bounds (seconds) for latency histograms, roughly 1ms to 30s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Upper bounds (seconds) for short critical sections such as lock waits, 1us to 1s
+FAST_BUCKETS = (0.000001, 0.00001, 0.0001, 0.001, 0.01, 0.1, 1)
+
+logger = logging.getLogger(__name__)
+
+
+class _CounterChild:
+    __slots__ = ('lock', 'value')
+
+    def __init__(self):
+        self.lock = Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+    def sample(self):
+        return self.value
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value):
+        self.value = value
+
+
+class _HistogramChild:
+    __slots__ = ('lock', 'bounds', 'counts', 'sum')
+
+    def __init__(self, bounds):
+        self.lock = Lock()
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def sample(self):
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        cumulative, buckets = 0, {}
+        for bound, count in zip(self.bounds + (float('inf'),), counts):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {'buckets': buckets, 'sum': total, 'count': cumulative}
+
+
+# A named metric with optional labels. Without labels it is its own single child, so hot paths can
+# bind a child once (metric.labels(outcome='up')) and skip the label lookup on every update.
+class Metric:
+
+    def __init__(self, kind, name, help, labelnames=(), buckets=LATENCY_BUCKETS, callback=None):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.callback = callback  # gauges only: called at collection time instead of being set
+        self.lock = Lock()
+        self._children = {}  # label values tuple: child
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self.lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self.__new_child()
+        return child
+
+    # Drops the child for these label values, e.g. once the caller it counted is gone
+    def remove(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self.lock:
+            self._children.pop(key, None)
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def set(self, value):
+        self._default.set(value)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def samples(self):
+        if self.callback is not None:
+            try:
+                return [({}, self.callback())]
+            except Exception as exc:
+                logger.error("Metric %s callback failed: %s", self.name, exc)
+                return []
+        with self.lock:
+            children = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child.sample()) for key, child in children]
+
+    def __new_child(self):
+        if self.kind == 'histogram':
+            return _HistogramChild(self.buckets)
+        return _GaugeChild() if self.kind == 'gauge' else _CounterChild()
+
+
+# Process-local metrics readable as a snapshot (dict) or in the Prometheus text exposition format
+class MetricsRegistry:
+
+    def __init__(self):
+        self.lock = Lock()
+        self._metrics = {}  # name: Metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.__register(Metric('counter', name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=(), callback=None):
+        return self.__register(Metric('gauge', name, help, labelnames, callback=callback))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.__register(Metric('histogram', name, help, labelnames, buckets))
+
+    # {name: [{'labels': {...}, 'value': number or {'buckets', 'sum', 'count'}}]}
+    def snapshot(self):
+        with self.lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: [{'labels': labels, 'value': value} for labels, value in metric.samples()]
+                for metric in metrics}
+
+    def render_prometheus(self):
+        with self.lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in metric.samples():
+                if metric.kind != 'histogram':
+                    lines.append(f"{metric.name}{_format_labels(labels)} {_format_value(value)}")
+                    continue
+                for bound, count in value['buckets'].items():
+                    le = '+Inf' if bound == float('inf') else _format_value(bound)
+                    lines.append(f"{metric.name}_bucket{_format_labels({**labels, 'le': le})} {count}")
+                lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(value['sum'])}")
+                lines.append(f"{metric.name}_count{_format_labels(labels)} {value['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def __register(self, metric):
+        with self.lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+
+# Drop-in for threading.Lock that records how long callers wait for it and how long they hold it
+class TimedLock:
+
+    def __init__(self, wait_histogram, hold_histogram):
+        self._lock = Lock()
+        self.wait_histogram = wait_histogram
+        self.hold_histogram = hold_histogram
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking=True, timeout=-1):
+        start = monotonic()
+        acquired = self._lock.acquire(blocking, timeout)
+        if acquired:
+            self._acquired_at = monotonic()
+            self.wait_histogram.observe(self._acquired_at - start)
+        return acquired
+
+    def release(self):
+        held = monotonic() - self._acquired_at
+        self._lock.release()
+        self.hold_histogram.observe(held)
+
+    def locked(self):
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+# Serves GET /metrics in the Prometheus text format from a daemon thread
+class MetricsServer:
+
+    def __init__(self, registry, host='127.0.0.1', port=9100):
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.host, self.port = self.server.server_address[:2]
+        self.thread = Thread(target=self.server.serve_forever, daemon=True, name="metrics-server")
+
+    def start(self):
+        self.thread.start()
+        logger.info("MetricsServer listening on http://%s:%s/metrics", self.host, self.port)
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (name + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for name, value in labels.items())
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
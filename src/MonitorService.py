@@ -1,87 +1,262 @@
 import logging
 import socket
 
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime, timedelta
+from queue import SimpleQueue, Empty
 from threading import Thread, Event
-from time import sleep
 
 from ConfigService import ConfigService
+from DnsCache import DnsCache
+from EventLog import service_id
+from FlapDetector import FlapDetector
+from NotificationDispatcher import DROP_OLDEST, NotificationDispatcher, NotificationLogSink, LoggingSink
+from NotificationLog import NotificationLog
+from ProbeEngine import AsyncProbeEngine, ConnectionBudget, ThreadProbeEngine, tcp_probe
+from RetryPolicy import RetryPolicy
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 
 class MonitorService(ConfigService):
     DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+    TICK_INTERVAL = 1  # seconds
+    TICK_OVERRUN_TOLERANCE = 0.05  # seconds a tick may exceed TICK_INTERVAL before it counts as an overrun
 
-    def __init__(self, grace_time=10, shutdown_event=None):
-        super().__init__(grace_time)
-        self.logs = defaultdict(list)
+    def __init__(self, grace_time=10, shutdown_event=None, use_asyncio=False, max_concurrency=1000, max_workers=32,
+                 retry_policy=None, log_max_entries=1000, log_max_age=None, store=None, event_log=None,
+                 status_history=None, notification_log=None, notification_sinks=(), notification_batch_window=0.1,
+                 notification_max_pending=100000, notification_max_batches=10000, notification_overflow=DROP_OLDEST,
+                 edge_triggered=False, flap_detector=None, dns_cache=None, connect_timeout=2, abortive_close=False,
+                 connection_budget=None, metrics=None, clock=None, probe_engine=None, start=True):
+        # Notify only on status changes instead of every polling window. Set before ConfigService loads the
+        # registry, since only edge-triggered services track which subscribers are owed the current status.
+        self.edge_triggered = edge_triggered
+        super().__init__(grace_time, store, metrics, clock)
+        if notification_log is None:
+            notification_log = NotificationLog(log_max_entries, log_max_age, self.clock)
+        self.logs = notification_log
+        log_sink = NotificationLogSink(self.logs, lambda callerId: callerId in self.snapshot.callers)
+        self.dispatcher = NotificationDispatcher([log_sink, LoggingSink(), *notification_sinks],
+                                                 notification_batch_window, notification_max_pending,
+                                                 notification_max_batches, notification_overflow)
         self.shutdown_event = shutdown_event or Event()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.flap_detector = flap_detector or FlapDetector()
+        self.dns_cache = dns_cache or DnsCache()
+        self.connect_timeout = connect_timeout  # seconds per connection attempt
+        self.abortive_close = abortive_close  # reset probe connections (SO_LINGER 0) to leave no TIME_WAIT sockets
+        self.connection_budget = ConnectionBudget(connection_budget)  # max probe connections open at once
+        if probe_engine is not None:
+            self.probe_engine = probe_engine
+        elif use_asyncio:
+            self.probe_engine = AsyncProbeEngine(self.grace_time, max_concurrency, connect_timeout, self.retry_policy,
+                                                 abortive_close, self.connection_budget, self.clock, self.dns_cache)
+        else:
+            self.probe_engine = ThreadProbeEngine(self.__check_service_status, max_workers)
+        self.event_log = event_log  # optional EventLogWriter recording every probe outcome
+        self.status_history = status_history  # optional StatusHistory answering uptime/SLA queries
+        self.in_flight = {}  # key: (host, port) of a probe submitted but not yet applied, value: monotonic submit time
+        self.probe_targets = {}  # key: endpoint being probed, value: [(host, port)] of the services waiting on it
+        self.results = SimpleQueue()  # ((host, port), future, monotonic completion time) of completed probes
+        self.tick_overruns = 0
+        self._caller_notifications = {}  # callerId: its bound child of monitor_notifications_total
+        self.__register_metrics()
         self.check_thread = Thread(target=self.check_services, daemon=True)
-        self.check_thread.start()
-        logging.info("MonitorService initialized and monitoring thread started.")
+        if start:
+            self.check_thread.start()
+            logger.info("MonitorService initialized and monitoring thread started.")
 
     def check_services(self):
-        while True:
-            if len(self.services) != 0:
+        deadline = self.clock.monotonic()
+        while not self.shutdown_event.is_set():
+            tick_start = self.clock.monotonic()
+            deadline = self.clock.next_deadline(deadline, MonitorService.TICK_INTERVAL)
+
+            self.__submit_due_checks()
+            self.__apply_results(deadline)
+
+            tick_duration = self.clock.monotonic() - tick_start
+            self._tick_seconds.observe(tick_duration)
+            if tick_duration > MonitorService.TICK_INTERVAL + MonitorService.TICK_OVERRUN_TOLERANCE:
+                self.tick_overruns += 1
+                self._tick_overruns.inc()
+                logger.warning("Monitor tick overran: %.3fs, %s probes in flight", tick_duration, len(self.in_flight))
+        self.close()
+
+    # One tick without waiting: submits the due checks, applies the results that are already in and hands
+    # the tick's notifications to the sinks (batch windows are real time, so each driven tick is one batch).
+    # For a monitor created with start=False, e.g. driven step by step alongside a VirtualClock.
+    def tick(self):
+        self.__submit_due_checks()
+        self.__apply_results(None)
+        self.dispatcher.flush()
+
+    # Stops the probe engine and flushes notifications; the monitoring thread does this itself on shutdown
+    def close(self):
+        self.probe_engine.shutdown()
+        self.dispatcher.close()
+        self.dns_cache.close()
+        if self.event_log is not None:
+            self.event_log.close()
+
+    # Also drops the caller's notification log and metric series, so callers coming and going leave nothing behind
+    def unregister_caller(self, callerId):
+        super().unregister_caller(callerId)
+        self.logs.remove(callerId)
+        self._caller_notifications.pop(callerId, None)
+        self._notifications.remove(caller=callerId)
+
+    def join(self, timeout=None):
+        if self.check_thread.is_alive():
+            self.check_thread.join(timeout)
 
-                with ThreadPoolExecutor(max_workers=len(self.services)) as executor:
+    def __submit_due_checks(self):
+        now = self.clock.monotonic()
+        time_now = self.clock.now()
+        to_check = []
+        services = self.snapshot.services
+        for (host, port), due_time in self.scheduler.pop_due_times(now):
+            self._services_due.inc()
+            service = services.get((host, port))
+            if service is None:
+                continue
+            if (host, port) in self.in_flight:
+                # A slow probe from an earlier tick is still running; its result reschedules the service
+                self._skipped_in_flight.inc()
+                continue
+            outage_end = self.outages.outage_end((host, port), time_now)
+            if outage_end is not None:
+                self._skipped_outage.inc()
+                outage_left = (outage_end - time_now).total_seconds()
+                self.scheduler.schedule((host, port), now + outage_left + MonitorService.MIN_CHECK_INTERVAL)
+                continue
+            # Anchor the check to when it was due, not to when this tick happened to start, so the next one
+            # lands on the tick grid rather than just after it; a check late by more than a tick is re-anchored.
+            service.last_checked = max(due_time, now - MonitorService.TICK_INTERVAL)
+            self.in_flight[(host, port)] = now
+            # Services whose hosts resolve to the same address share one probe. It connects through the first
+            # service's host, so every address of that name is tried rather than only the one in the key.
+            endpoint = self.dns_cache.endpoint(host, port) or (host, port)
+            waiting = self.probe_targets.get(endpoint)
+            if waiting is None:
+                self.probe_targets[endpoint] = [(host, port)]
+                to_check.append((endpoint, host, port))
+            else:
+                waiting.append((host, port))
 
-                    future_to_service = {}
-                    for (host, port) in self.services.keys():
-                        service = self.services[(host, port)]
-                        time_now = datetime.now()
-                        if self.__is_service_check_allowed(service, time_now):
-                            future_to_service[executor.submit(self.__check_service_status, host, port, time_now)] = (host, port)
+        self._probes_submitted.inc(len(to_check))
+        for endpoint, host, port in to_check:
+            future = self.probe_engine.submit(host, port, time_now)
+            future.add_done_callback(lambda f, endpoint=endpoint: self.results.put((endpoint, f, self.clock.monotonic())))
 
-                    for future in as_completed(future_to_service):
-                        host, port = future_to_service[future]
-                        try:
-                            status = future.result()
-                            with self.lock:
-                                service = self.services[(host, port)]
-                                service.is_up = status
-                                self.__notify_subscribers(service)
+    # Applies probe results until `deadline` (monotonic seconds), or only those already queued when it is None
+    def __apply_results(self, deadline):
+        while True:
+            try:
+                if deadline is None:
+                    endpoint, future, completed = self.results.get_nowait()
+                else:
+                    remaining = deadline - self.clock.monotonic()
+                    if remaining <= 0:
+                        return
+                    endpoint, future, completed = self.results.get(timeout=remaining)
+            except Empty:
+                return
+
+            try:
+                status = future.result()
+            except Exception as exc:
+                status = None
+                logger.error('%s:%s generated an exception: %s', endpoint[0], endpoint[1], exc)
+            for (host, port) in self.probe_targets.pop(endpoint, ()):
+                self.__apply_result(host, port, status, completed)
 
-                        except Exception as exc:
-                            logging.error(f'{host}:{port} generated an exception: {exc}')
+    def __apply_result(self, host, port, status, completed):
+        submitted = self.in_flight.pop((host, port), completed)
+        self._probe_latency[status].observe(completed - submitted)
+        if status is not None:
+            timestamp = self.clock.time()
+            if self.event_log is not None:
+                self.event_log.append(timestamp, service_id(host, port), status, completed - submitted)
+            if self.status_history is not None:
+                self.status_history.record((host, port), status, timestamp)
 
-            sleep(1)
+        service = self.snapshot.services.get((host, port))
+        if service is None:
+            return
+        with self.service_locks.lock_for((host, port)):
+            if status is not None:
+                if self.flap_detector.observe(service, status, self.clock.monotonic()) and self.edge_triggered:
+                    service.mark_changed()
+                if not service.flapping:
+                    self.__notify_subscribers(service)
+            probe_interval = self.flap_detector.probe_interval(service)
+            if probe_interval is not None:
+                self.scheduler.schedule((host, port), service.last_checked + probe_interval)
+
+    def __register_metrics(self):
+        metrics = self.metrics
+        self._tick_seconds = metrics.histogram('monitor_tick_seconds', 'Duration of monitor ticks')
+        self._tick_overruns = metrics.counter('monitor_tick_overruns_total', 'Ticks that ran past the tick interval')
+        self._services_due = metrics.counter('monitor_services_due_total', 'Services taken from the schedule as due')
+        skipped = metrics.counter('monitor_checks_skipped_total', 'Due services not probed', ['reason'])
+        self._skipped_in_flight = skipped.labels(reason='in_flight')
+        self._skipped_outage = skipped.labels(reason='outage')
+        self._probes_submitted = metrics.counter('monitor_probes_submitted_total', 'Probes handed to the probe engine')
+        latency = metrics.histogram('monitor_probe_latency_seconds', 'Probe submit to result time', ['outcome'])
+        self._probe_latency = {True: latency.labels(outcome='up'), False: latency.labels(outcome='down'),
+                               None: latency.labels(outcome='unknown')}
+        self._notifications = metrics.counter('monitor_notifications_total', 'Notifications emitted', ['caller'])
+        metrics.gauge('monitor_probe_queue_depth', 'Probes waiting for a probe engine worker',
+                      callback=lambda: self.probe_engine.queue_depth)
+        metrics.gauge('monitor_probes_in_flight', 'Endpoints currently being probed',
+                      callback=lambda: len(self.probe_targets))
+        metrics.gauge('monitor_connections_in_flight', 'Probe connections open or being opened',
+                      callback=lambda: self.connection_budget.in_flight)
+        metrics.gauge('monitor_scheduled_services', 'Services in the probe schedule', callback=lambda: len(self.scheduler))
+        metrics.gauge('monitor_notifications_dropped', 'Notifications dropped by the dispatcher or its sinks',
+                      callback=lambda: self.dispatcher.dropped + self.dispatcher.sink_dropped)
 
     def __check_service_status(self, host, port, time_now):
-        status = False
-        while not status and datetime.now() - time_now < self.grace_time:
+        attempt = 0
+        while self.clock.now() - time_now < self.grace_time:
+            attempt += 1
+            if not self.connection_budget.acquire((self.grace_time - (self.clock.now() - time_now)).total_seconds()):
+                logger.warning("Connection budget exhausted, %s:%s not probed", host, port)
+                return None
             try:
-                with socket.create_connection((host, port), timeout=2):
-                    status = True
+                return tcp_probe(self.dns_cache.resolve(host), port, self.connect_timeout, self.abortive_close)
             except socket.error:
-                status = False
+                pass
             except Exception as e:
-                status = False
-                logging.error(f"__check_service_status() - ERROR: {e}")
+                logger.error("__check_service_status() - ERROR: %s", e)
+                return False
+            finally:
+                self.connection_budget.release()
+
+            remaining = (self.grace_time - (self.clock.now() - time_now)).total_seconds()
+            delay = self.retry_policy.backoff(attempt, remaining)
+            if delay is None:
                 break
-        return status
+            self.clock.sleep(delay)
+        return False
 
     def __notify_subscribers(self, service):
-        log_message = f"Service {service.host}:{service.port} is {'up' if service.is_up else 'down'}"
-        logging.debug(log_message)
-
-        for callerId in service.subscribers:
-            time_now = datetime.now()
-            caller = self.callers[callerId]
-
-            polling_frequency = caller.subscribed[(service.host, service.port)]['polling_frequency']
-            last_checked = caller.subscribed[(service.host, service.port)]['last_checked']
-
-            if last_checked + polling_frequency <= time_now:
-                caller.subscribed[(service.host, service.port)]['last_checked'] = time_now
-                caller.subscribed[(service.host, service.port)]['status'] = service.is_up
-                logging.info(f"Notifying {caller.name} about service status change: {log_message}")
-                self.logs[caller.callerId].append(log_message)
-
-    @staticmethod
-    def __is_service_check_allowed(service, time_now):
-        return service.last_checked + timedelta(seconds=1) <= time_now and \
-               not (service.outage_start and service.outage_end and (service.outage_start <= time_now <= service.outage_end))
+        logger.debug("Service %s:%s is %s", service.host, service.port, 'up' if service.is_up else 'down')
+
+        # Edge-triggered: only subscribers still owed the current status are looked at, so an unchanged
+        # service costs nothing. Polling windows are measured between checks, not result arrivals, so probe
+        # latency jitter doesn't make a subscriber polling at the probe interval miss every other result.
+        if self.edge_triggered:
+            if not service.pending:
+                return
+            due = service.take_pending_subscribers(service.last_checked)
+        else:
+            due = service.take_due_subscribers(service.last_checked)
+        timestamp = self.clock.time()
+        for callerId, subscription in due:
+            subscription.last_status = service.is_up
+            counter = self._caller_notifications.get(callerId)
+            if counter is None:
+                counter = self._caller_notifications[callerId] = self._notifications.labels(caller=callerId)
+            counter.inc()
+            self.dispatcher.submit(callerId, service.host, service.port, service.is_up, timestamp)
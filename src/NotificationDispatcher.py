@@ -0,0 +1,157 @@
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque, namedtuple
+from threading import Condition, Event, Lock, Thread
+from time import time
+
+logger = logging.getLogger(__name__)
+
+Notification = namedtuple('Notification', ['callerId', 'host', 'port', 'is_up', 'timestamp'])
+
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+BLOCK = 'block'
+
+
+# A per-caller delivery channel. deliver() receives every notification for one caller collected
+# during a batch window, oldest first, and runs on the sink's own worker thread.
+# A sink may set its own overflow policy and queue bound; None uses the dispatcher's.
+class NotificationSink(ABC):
+    overflow = None
+    max_batches = None
+
+    @abstractmethod
+    def deliver(self, callerId, notifications):
+        pass
+
+
+# Keeps notifications readable through MonitorService.logs. With `is_registered`, batches still queued for
+# a caller that has since been unregistered are dropped instead of recreating its log.
+class NotificationLogSink(NotificationSink):
+
+    def __init__(self, notification_log, is_registered=None):
+        self.notification_log = notification_log
+        self.is_registered = is_registered
+
+    def deliver(self, callerId, notifications):
+        if self.is_registered is not None and not self.is_registered(callerId):
+            return
+        for notification in notifications:
+            self.notification_log.append(callerId, notification.host, notification.port, notification.is_up,
+                                         notification.timestamp)
+
+
+# One log line per caller per batch
+class LoggingSink(NotificationSink):
+
+    def deliver(self, callerId, notifications):
+        changes = ', '.join(f"{n.host}:{n.port} is {'up' if n.is_up else 'down'}" for n in notifications)
+        logger.info("Notifying %s about service status change: %s", callerId, changes)
+
+
+# Feeds one sink from a bounded queue of (callerId, notifications) batches on its own thread.
+# When the sink falls behind, `overflow` decides: drop the oldest batch, drop the incoming batch,
+# or block the dispatcher (never the probes, which keep coalescing into the dispatcher's pending set).
+class _SinkWorker:
+
+    def __init__(self, sink, max_batches, overflow):
+        self.sink = sink
+        self.max_batches = max_batches
+        self.overflow = overflow
+        self.batches = deque()
+        self.condition = Condition()
+        self.closed = False
+        self.dropped = 0  # notifications dropped because the sink fell behind
+        self.thread = Thread(target=self.__run, daemon=True, name=f"sink-{type(sink).__name__}")
+        self.thread.start()
+
+    def offer(self, batch):
+        with self.condition:
+            while len(self.batches) >= self.max_batches and not self.closed:
+                if self.overflow == BLOCK:
+                    self.condition.wait()
+                elif self.overflow == DROP_OLDEST:
+                    self.dropped += len(self.batches.popleft()[1])
+                else:
+                    self.dropped += len(batch[1])
+                    return
+            self.batches.append(batch)
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+
+    def __run(self):
+        while True:
+            with self.condition:
+                while not self.batches and not self.closed:
+                    self.condition.wait()
+                if not self.batches:
+                    return
+                callerId, notifications = self.batches.popleft()
+                self.condition.notify_all()
+            try:
+                self.sink.deliver(callerId, notifications)
+            except Exception as exc:
+                logger.error("%s failed to deliver to %s: %s", type(self.sink).__name__, callerId, exc)
+
+
+# Moves notification delivery off the probe path. submit() only records the notification:
+# repeated updates for the same caller and service within one batch window are coalesced
+# into the latest one, and a background thread hands each caller's batch to every sink.
+class NotificationDispatcher:
+
+    def __init__(self, sinks, batch_window=0.1, max_pending=100000, max_batches=10000, overflow=DROP_OLDEST):
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.lock = Lock()
+        self._pending = OrderedDict()  # callerId: OrderedDict of (host, port) -> Notification
+        self._pending_count = 0
+        self.dropped = 0  # notifications dropped because max_pending was reached
+        self.workers = [_SinkWorker(sink, getattr(sink, 'max_batches', None) or max_batches,
+                                    getattr(sink, 'overflow', None) or overflow) for sink in sinks]
+        self._stopped = Event()
+        self.thread = Thread(target=self.__run, daemon=True, name="notification-dispatcher")
+        self.thread.start()
+
+    def submit(self, callerId, host, port, is_up, timestamp=None):
+        notification = Notification(callerId, host, port, is_up, time() if timestamp is None else timestamp)
+        with self.lock:
+            pending = self._pending.get(callerId)
+            if pending is None:
+                pending = self._pending[callerId] = OrderedDict()
+            if (host, port) in pending:
+                del pending[(host, port)]
+            elif self._pending_count >= self.max_pending:
+                self.dropped += 1
+                return
+            else:
+                self._pending_count += 1
+            pending[(host, port)] = notification
+
+    def flush(self):
+        with self.lock:
+            pending, self._pending = self._pending, OrderedDict()
+            self._pending_count = 0
+        for callerId, notifications in pending.items():
+            batch = (callerId, list(notifications.values()))
+            for worker in self.workers:
+                worker.offer(batch)
+
+    def close(self):
+        self._stopped.set()
+        self.thread.join()
+        self.flush()
+        for worker in self.workers:
+            worker.close()
+
+    @property
+    def sink_dropped(self):
+        return sum(worker.dropped for worker in self.workers)
+
+    def __run(self):
+        while not self._stopped.wait(self.batch_window):
+            self.flush()
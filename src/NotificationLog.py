@@ -0,0 +1,104 @@
+from collections import deque, namedtuple
+from itertools import islice
+from threading import Condition
+from time import monotonic
+
+from Clock import RealClock
+
+
+class LogEntry(namedtuple('LogEntry', ['seq', 'timestamp', 'host', 'port', 'is_up'])):
+    __slots__ = ()
+
+    def __str__(self):
+        return f"Service {self.host}:{self.port} is {'up' if self.is_up else 'down'}"
+
+
+# Bounded per-caller ring buffers of notification records.
+# Every caller has its own sequence numbers; a cursor is the seq of the next entry a reader wants,
+# so polling readers only ever touch entries they haven't seen yet.
+class NotificationLog:
+
+    def __init__(self, max_entries=1000, max_age=None, clock=None):
+        self.max_entries = max_entries
+        self.max_age = max_age  # seconds, None keeps entries until they are pushed out by max_entries
+        self.clock = clock or RealClock()  # stamps entries and ages them out; the monitor passes its own
+        self._buffers = {}  # callerId: deque of LogEntry
+        self._next_seq = {}  # callerId: seq of the next entry to append
+        self._condition = Condition()
+        self._listeners = []  # callables taking (callerId, entry), invoked after every append
+
+    def append(self, callerId, host, port, is_up, timestamp=None):
+        with self._condition:
+            buffer = self._buffers.get(callerId)
+            if buffer is None:
+                buffer = self._buffers[callerId] = deque(maxlen=self.max_entries)
+                self._next_seq[callerId] = 0
+            seq = self._next_seq[callerId]
+            self._next_seq[callerId] = seq + 1
+            entry = LogEntry(seq, timestamp if timestamp is not None else self.clock.time(), host, port, is_up)
+            buffer.append(entry)
+            self._expire(buffer)
+            self._condition.notify_all()
+        for listener in self._listeners:
+            listener(callerId, entry)
+        return entry
+
+    def add_listener(self, listener):
+        self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener):
+        self._listeners = [existing for existing in self._listeners if existing is not listener]
+
+    # Returns (entries with seq >= cursor, cursor to pass on the next call)
+    def read(self, callerId, cursor=0, limit=None):
+        with self._condition:
+            buffer = self._buffers.get(callerId)
+            if not buffer:
+                return [], max(cursor, self._next_seq.get(callerId, 0))
+            self._expire(buffer)
+            next_seq = self._next_seq[callerId]
+            new_count = min(len(buffer), max(0, next_seq - cursor))
+            # New entries sit at the tail, so walk backwards and touch only those
+            entries = list(islice(reversed(buffer), new_count))
+            entries.reverse()
+            if limit is not None:
+                entries = entries[:limit]
+            return entries, (entries[-1].seq + 1 if entries else max(cursor, next_seq))
+
+    # Yields entries as they are appended; stops after `timeout` seconds without a new entry for this caller.
+    # The condition is shared by all callers, so waking up for another caller's entry keeps the deadline.
+    def stream(self, callerId, cursor=0, timeout=None):
+        deadline = monotonic() + timeout if timeout is not None else None
+        while True:
+            entries, cursor = self.read(callerId, cursor)
+            if entries:
+                yield from entries
+                if timeout is not None:
+                    deadline = monotonic() + timeout
+                continue
+            with self._condition:
+                while self._next_seq.get(callerId, 0) <= cursor:
+                    remaining = deadline - monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        return
+                    self._condition.wait(remaining)
+
+    def remove(self, callerId):
+        with self._condition:
+            self._buffers.pop(callerId, None)
+            self._next_seq.pop(callerId, None)
+
+    def _expire(self, buffer):
+        if self.max_age is not None:
+            cutoff = self.clock.time() - self.max_age
+            while buffer and buffer[0].timestamp < cutoff:
+                buffer.popleft()
+
+    def __contains__(self, callerId):
+        return callerId in self._buffers
+
+    def __getitem__(self, callerId):
+        return self.read(callerId)[0]
+
+    def __repr__(self):
+        return f"NotificationLog(callers={len(self._buffers)}, max_entries={self.max_entries}, max_age={self.max_age})"
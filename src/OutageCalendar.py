@@ -0,0 +1,182 @@
+from bisect import bisect_left, bisect_right
+from threading import Lock
+
+
+# Windows of one owner (a service key or a group name), sorted by start. `reach[i]` is the latest end
+# among windows 0..i, so "which window covers t" is one bisect on the starts plus one lookup in reach,
+# and the windows that are over form a prefix of the list.
+class _WindowIndex:
+    __slots__ = ('windows', 'starts', 'reach')
+
+    def __init__(self):
+        self.windows = []  # (start, end, window_id)
+        self.starts = []
+        self.reach = []
+
+    def __len__(self):
+        return len(self.windows)
+
+    def add(self, start, end, window_id):
+        self.windows.insert(bisect_right(self.starts, start), (start, end, window_id))
+        self.__reindex()
+
+    def remove(self, window_id):
+        size = len(self.windows)
+        self.windows = [window for window in self.windows if window[2] != window_id]
+        if len(self.windows) != size:
+            self.__reindex()
+        return len(self.windows) != size
+
+    # End of the outage covering `now`, or None
+    def outage_end(self, now):
+        last = bisect_right(self.starts, now) - 1
+        if last >= 0 and self.reach[last] >= now:
+            return self.reach[last]
+        return None
+
+    # Drops every window that ended before `now` and is not followed by one reaching past it
+    def compact(self, now):
+        expired = bisect_left(self.reach, now)
+        if expired:
+            del self.windows[:expired]
+            self.__reindex()
+
+    def __reindex(self):
+        self.starts = [start for start, _, _ in self.windows]
+        self.reach = []
+        for _, end, _ in self.windows:
+            self.reach.append(max(end, self.reach[-1]) if self.reach else end)
+
+
+# A window repeating every `every` (a timedelta) from `start`, for occurrences starting up to `until`
+class _RecurringWindow:
+    __slots__ = ('start', 'duration', 'every', 'until')
+
+    def __init__(self, start, end, every, until):
+        self.start = start
+        self.duration = end - start
+        self.every = every
+        self.until = until
+
+    def outage_end(self, now):
+        if now < self.start:
+            return None
+        occurrence = self.start + (now - self.start) // self.every * self.every
+        if self.until is not None and occurrence > self.until:
+            return None
+        end = occurrence + self.duration
+        return end if now <= end else None
+
+    def expired(self, now):
+        return self.until is not None and self.until + self.duration < now
+
+
+# Planned outage windows for services and groups of services.
+# Owners are either a (host, port) key or a group name; a service is in outage when one of its own
+# windows or a window of any group it belongs to covers the current time. One-off windows sit in a
+# sorted index (logarithmic lookup), recurring windows are evaluated in constant time each, and
+# windows that are over are compacted away as lookups move past them.
+class OutageCalendar:
+
+    def __init__(self):
+        self.lock = Lock()
+        self._windows = {}  # owner: _WindowIndex
+        self._recurring = {}  # owner: {window_id: _RecurringWindow}
+        self._groups = {}  # (host, port): set of group names
+        self._last_id = 0  # generated window ids are integers above every integer id seen so far
+
+    # Adds a window and returns its id; adding with an existing id replaces that window.
+    # `every` (a timedelta) repeats the window, up to the occurrence starting at `until` if given.
+    def add(self, owner, start, end, every=None, until=None, window_id=None):
+        with self.lock:
+            if window_id is None:
+                self._last_id += 1
+                window_id = self._last_id
+            else:
+                self.__remove(owner, window_id)
+                if isinstance(window_id, int):
+                    self._last_id = max(self._last_id, window_id)
+            if every is not None:
+                self._recurring.setdefault(owner, {})[window_id] = _RecurringWindow(start, end, every, until)
+            else:
+                index = self._windows.get(owner)
+                if index is None:
+                    index = self._windows[owner] = _WindowIndex()
+                index.add(start, end, window_id)
+            return window_id
+
+    def remove(self, owner, window_id):
+        with self.lock:
+            return self.__remove(owner, window_id)
+
+    # Forgets every window of the owner and, for a service, its group memberships
+    def clear(self, owner):
+        with self.lock:
+            self._windows.pop(owner, None)
+            self._recurring.pop(owner, None)
+            self._groups.pop(owner, None)
+
+    def join_group(self, group, key):
+        with self.lock:
+            self._groups.setdefault(key, set()).add(group)
+
+    def leave_group(self, group, key):
+        with self.lock:
+            groups = self._groups.get(key)
+            if groups is not None:
+                groups.discard(group)
+                if not groups:
+                    del self._groups[key]
+
+    def members(self, group):
+        with self.lock:
+            return [key for key, groups in self._groups.items() if group in groups]
+
+    # End of the latest window covering `now` for the service, or None when it is not in outage
+    def outage_end(self, key, now):
+        with self.lock:
+            latest = self.__outage_end(key, now)
+            for group in self._groups.get(key, ()):
+                end = self.__outage_end(group, now)
+                if end is not None and (latest is None or end > latest):
+                    latest = end
+            return latest
+
+    def in_outage(self, key, now):
+        return self.outage_end(key, now) is not None
+
+    def __outage_end(self, owner, now):
+        latest = None
+        index = self._windows.get(owner)
+        if index is not None:
+            index.compact(now)
+            if not index:
+                del self._windows[owner]
+            else:
+                latest = index.outage_end(now)
+        recurring = self._recurring.get(owner)
+        if recurring:
+            for window_id, window in list(recurring.items()):
+                if window.expired(now):
+                    del recurring[window_id]
+                    continue
+                end = window.outage_end(now)
+                if end is not None and (latest is None or end > latest):
+                    latest = end
+            if not recurring:
+                del self._recurring[owner]
+        return latest
+
+    def __remove(self, owner, window_id):
+        removed = False
+        index = self._windows.get(owner)
+        if index is not None and index.remove(window_id):
+            removed = True
+            if not index:
+                del self._windows[owner]
+        recurring = self._recurring.get(owner)
+        if recurring is not None and recurring.pop(window_id, None) is not None:
+            removed = True
+            if not recurring:
+                del self._recurring[owner]
+        return removed
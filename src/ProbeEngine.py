@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import socket
+import struct
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Condition, Lock, Thread
+
+from Clock import RealClock
+from RetryPolicy import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+# SO_LINGER on with a zero timeout: close() sends RST instead of FIN, so no TIME_WAIT socket is left behind
+LINGER_ABORT = struct.pack('ii', 1, 0)
+
+
+# Counts TCP connections being opened or still open against `limit` (None for no limit).
+# When the budget is exhausted acquire() waits, throttling probes instead of running out of ephemeral ports.
+# Coroutines use acquire_async(), which waits on their own event loop instead of blocking a thread.
+class ConnectionBudget:
+
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.in_flight = 0
+        self.peak = 0
+        self.throttled = 0  # acquisitions that had to wait for a free slot
+        self.condition = Condition()
+        self._async_waiters = deque()  # (loop, asyncio future) of coroutines waiting for a slot, oldest first
+
+    def try_acquire(self):
+        with self.condition:
+            if self.limit is not None and self.in_flight >= self.limit:
+                return False
+            self.__take()
+            return True
+
+    def acquire(self, timeout=None):
+        with self.condition:
+            if self.limit is not None and self.in_flight >= self.limit:
+                self.throttled += 1
+                if not self.condition.wait_for(lambda: self.in_flight < self.limit, timeout):
+                    return False
+            self.__take()
+            return True
+
+    async def acquire_async(self, timeout=None):
+        if self.try_acquire():
+            return True
+        loop = asyncio.get_running_loop()
+        with self.condition:
+            self.throttled += 1
+        deadline = loop.time() + timeout if timeout is not None else None
+        while True:
+            waiter = loop.create_future()
+            with self.condition:
+                self._async_waiters.append((loop, waiter))
+            # A slot may have been freed by another thread before the waiter was registered
+            if self.try_acquire():
+                waiter.cancel()
+                return True
+            try:
+                await asyncio.wait_for(waiter, deadline - loop.time() if deadline is not None else None)
+            except asyncio.TimeoutError:
+                # A wake-up racing the timeout must not be lost
+                return self.try_acquire()
+            if self.try_acquire():
+                return True
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+        self.__wake_async_waiter()
+
+    # Wakes the oldest coroutine still waiting; a waiter that timed out meanwhile passes the wake-up on
+    def __wake_async_waiter(self):
+        with self.condition:
+            while self._async_waiters:
+                loop, waiter = self._async_waiters.popleft()
+                if not waiter.done():
+                    break
+            else:
+                return
+        try:
+            loop.call_soon_threadsafe(self.__wake, waiter)
+        except RuntimeError:  # the waiter's loop is closed
+            self.__wake_async_waiter()
+
+    def __wake(self, waiter):
+        if waiter.done():
+            self.__wake_async_waiter()
+        else:
+            waiter.set_result(None)
+
+    def __take(self):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+
+
+# One blocking TCP handshake; with `abortive` the connection is reset rather than closed gracefully.
+# `host` may be a sequence of addresses, tried in order until one connects, like socket.create_connection().
+def tcp_probe(host, port, timeout, abortive=False):
+    error = None
+    for address in (host,) if isinstance(host, str) else host:
+        try:
+            with socket.create_connection((address, port), timeout=timeout) as sock:
+                if abortive:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER_ABORT)
+            return True
+        except OSError as exc:
+            error = exc
+    raise error or OSError(f"No address to probe for port {port}")
+
+
+# Long-lived, fixed-size worker pool fed with blocking probes; threads are reused across ticks.
+class ThreadProbeEngine:
+
+    def __init__(self, probe, max_workers=32):
+        self.probe = probe
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="probe")
+        self.lock = Lock()
+        self.queue_depth = 0  # probes submitted but not yet picked up by a worker
+        logger.info("ThreadProbeEngine started with %s workers", self.max_workers)
+
+    def submit(self, host, port, time_now):
+        with self.lock:
+            self.queue_depth += 1
+        return self.executor.submit(self.__run, host, port, time_now)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __run(self, host, port, time_now):
+        with self.lock:
+            self.queue_depth -= 1
+        return self.probe(host, port, time_now)
+
+
+# Runs each probe synchronously inside submit() and hands back an already completed Future.
+# With a VirtualClock and a simulated probe this makes a MonitorService run fully deterministic.
+class InlineProbeEngine:
+
+    def __init__(self, probe):
+        self.probe = probe
+        self.queue_depth = 0
+
+    def submit(self, host, port, time_now):
+        future = Future()
+        try:
+            future.set_result(self.probe(host, port, time_now))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def shutdown(self):
+        pass
+
+
+# Runs every TCP check as a non-blocking coroutine on one event loop living in a daemon thread.
+# submit() is thread-safe and returns a concurrent.futures.Future, same as ThreadPoolExecutor.submit().
+# With a DnsCache, host names are connected through their cached addresses, each tried in turn.
+class AsyncProbeEngine:
+
+    def __init__(self, grace_time, max_concurrency=1000, connect_timeout=2, retry_policy=None, abortive_close=False,
+                 connection_budget=None, clock=None, dns_cache=None):
+        self.grace_time = grace_time
+        self.clock = clock or RealClock()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.max_concurrency = max_concurrency
+        self.connect_timeout = connect_timeout
+        self.abortive_close = abortive_close
+        self.connection_budget = connection_budget or ConnectionBudget()
+        self.dns_cache = dns_cache
+        self.loop = asyncio.new_event_loop()
+        self._semaphore = None
+        self.queue_depth = 0  # probes waiting for a concurrency slot, only touched on the loop thread
+        self.thread = Thread(target=self._run_loop, daemon=True)
+        self.thread.start()
+        logger.info("AsyncProbeEngine started with max concurrency: %s", self.max_concurrency)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, host, port, time_now):
+        return asyncio.run_coroutine_threadsafe(self._check_service_status(host, port, time_now), self.loop)
+
+    def shutdown(self):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    async def _check_service_status(self, host, port, time_now):
+        # The semaphore must be created on the loop thread, so it is built on first use
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        attempt = 0
+        while self.clock.now() - time_now < self.grace_time:
+            attempt += 1
+            try:
+                self.queue_depth += 1
+                async with self._semaphore:
+                    self.queue_depth -= 1
+                    # The budget is taken only once a connect can start, so it counts real connections
+                    remaining = (self.grace_time - (self.clock.now() - time_now)).total_seconds()
+                    if not await self.connection_budget.acquire_async(max(0.0, remaining)):
+                        logger.warning("Connection budget exhausted, %s:%s not probed", host, port)
+                        return None
+                    try:
+                        return await self._try_connect(host, port)
+                    finally:
+                        self.connection_budget.release()
+            except (OSError, asyncio.TimeoutError):
+                pass
+            except Exception as e:
+                logger.error("AsyncProbeEngine._check_service_status() - ERROR: %s", e)
+                return False
+
+            remaining = (self.grace_time - (self.clock.now() - time_now)).total_seconds()
+            delay = self.retry_policy.backoff(attempt, remaining)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+        return False
+
+    async def _try_connect(self, host, port):
+        # A name not cached yet is left to open_connection(), which resolves it and tries every address itself
+        addresses = (self.dns_cache.cached(host) if self.dns_cache is not None else None) or (host,)
+        error = None
+        for address in addresses:
+            try:
+                return await self._connect(address, port)
+            except (OSError, asyncio.TimeoutError) as exc:
+                error = exc
+        raise error
+
+    async def _connect(self, host, port):
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=self.connect_timeout)
+        if self.abortive_close:
+            writer.get_extra_info('socket').setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, LINGER_ABORT)
+            writer.transport.abort()
+            return True
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
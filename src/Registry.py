@@ -0,0 +1,101 @@
+from collections import namedtuple
+from collections.abc import Mapping
+from itertools import chain
+from threading import Lock
+
+_MISSING = object()
+
+
+# Immutable mapping split into hash buckets. An update copies only the buckets it touches and shares the
+# rest with the previous map, so publishing one change costs about sqrt(n) instead of a copy of all n items.
+# The bucket count doubles whenever it falls below sqrt(n), keeping both the bucket tuple and the buckets small.
+class ChunkedMap(Mapping):
+    __slots__ = ('_buckets', '_length')
+    MIN_BUCKETS = 16
+
+    def __init__(self, buckets, length):
+        self._buckets = buckets
+        self._length = length
+
+    @classmethod
+    def from_dict(cls, items):
+        count = cls.MIN_BUCKETS
+        while count * count < len(items):
+            count *= 2
+        buckets = [{} for _ in range(count)]
+        for key, value in items.items():
+            buckets[hash(key) & (count - 1)][key] = value
+        return cls(tuple(buckets), len(items))
+
+    # Returns a new map where every key in `keys` is set to its value in `source`, or removed if it has none
+    def updated(self, keys, source):
+        mask = len(self._buckets) - 1
+        buckets = list(self._buckets)
+        copied = set()
+        length = self._length
+        for key in keys:
+            index = hash(key) & mask
+            if index not in copied:
+                buckets[index] = dict(buckets[index])
+                copied.add(index)
+            bucket = buckets[index]
+            value = source.get(key, _MISSING)
+            if value is _MISSING:
+                length -= bucket.pop(key, _MISSING) is not _MISSING
+            else:
+                length += key not in bucket
+                bucket[key] = value
+        if length > len(buckets) * len(buckets):
+            return ChunkedMap.from_dict(dict(chain.from_iterable(bucket.items() for bucket in buckets)))
+        return ChunkedMap(tuple(buckets), length)
+
+    def __getitem__(self, key):
+        return self._buckets[hash(key) & (len(self._buckets) - 1)][key]
+
+    def get(self, key, default=None):
+        return self._buckets[hash(key) & (len(self._buckets) - 1)].get(key, default)
+
+    def __contains__(self, key):
+        return key in self._buckets[hash(key) & (len(self._buckets) - 1)]
+
+    def __iter__(self):
+        return chain.from_iterable(self._buckets)
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return f"ChunkedMap({dict(self.items())!r})"
+
+
+# Immutable, versioned view of the registered services and callers.
+# ConfigService publishes a fresh one after every change, so readers never need ConfigService.lock.
+class RegistrySnapshot(namedtuple('RegistrySnapshot', ['version', 'services', 'callers'])):
+    __slots__ = ()
+
+    @classmethod
+    def empty(cls):
+        return cls(0, ChunkedMap.from_dict({}), ChunkedMap.from_dict({}))
+
+    # Applies the keys changed in `services` and `callers` since `previous`; None rebuilds that map from scratch
+    @classmethod
+    def publish(cls, previous, services, callers, changed_services=None, changed_callers=None):
+        return cls(previous.version + 1,
+                   cls.__apply(previous.services, services, changed_services),
+                   cls.__apply(previous.callers, callers, changed_callers))
+
+    @staticmethod
+    def __apply(previous, current, changed):
+        if changed is None:
+            return ChunkedMap.from_dict(current)
+        return previous.updated(changed, current) if changed else previous
+
+
+# Fixed set of locks sharded by key, so work on unrelated services never queues on one mutex
+class StripedLock:
+
+    def __init__(self, stripes=64):
+        self._locks = [Lock() for _ in range(stripes)]
+
+    def lock_for(self, key):
+        return self._locks[hash(key) % len(self._locks)]
@@ -0,0 +1,30 @@
+import random
+
+
+# Exponential backoff with jitter used between connection attempts inside one grace window.
+class RetryPolicy:
+
+    def __init__(self, base_delay=0.1, max_delay=2.0, multiplier=2.0, max_attempts=5, jitter=0.5):
+        self.base_delay = base_delay  # seconds before the 2nd attempt
+        self.max_delay = max_delay  # cap on a single backoff, in seconds
+        self.multiplier = multiplier
+        self.max_attempts = max_attempts
+        self.jitter = jitter  # fraction of each delay that is randomised, 0 disables jitter
+
+    def delay(self, attempt):
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    # Seconds to wait after a failed `attempt` (1-based), or None once the attempt budget
+    # is spent or the backoff would not end before the grace window does
+    def backoff(self, attempt, remaining):
+        if attempt >= self.max_attempts:
+            return None
+        delay = self.delay(attempt)
+        if delay >= remaining:
+            return None
+        return delay
+
+    def __repr__(self):
+        return (f"RetryPolicy(base_delay={self.base_delay}, max_delay={self.max_delay}, multiplier={self.multiplier}, "
+                f"max_attempts={self.max_attempts}, jitter={self.jitter})")
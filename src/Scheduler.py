@@ -0,0 +1,59 @@
+import heapq
+from itertools import count
+from threading import Lock
+
+
+# Min-heap of service keys ordered by their next due time.
+# Rescheduling and removal are lazy: stale heap entries are skipped when popped and compacted away
+# once they outnumber the live ones, so every operation is O(log n) and a tick costs O(due).
+# All methods are thread-safe.
+class ServiceScheduler:
+
+    def __init__(self):
+        self._heap = []  # (due_time, seq, key)
+        self._entries = {}  # key: seq of the live heap entry
+        self._counter = count()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def schedule(self, key, due_time):
+        with self._lock:
+            seq = next(self._counter)
+            self._entries[key] = seq
+            heapq.heappush(self._heap, (due_time, seq, key))
+            self._compact()
+
+    def remove(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._compact()
+
+    def next_due(self):
+        with self._lock:
+            while self._heap and self._entries.get(self._heap[0][2]) != self._heap[0][1]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, time_now):
+        return [key for key, _ in self.pop_due_times(time_now)]
+
+    # Like pop_due, with the time each key was due: [(key, due_time)] in deadline order
+    def pop_due_times(self, time_now):
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= time_now:
+                due_time, seq, key = heapq.heappop(self._heap)
+                if self._entries.get(key) == seq:
+                    del self._entries[key]
+                    due.append((key, due_time))
+        return due
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [entry for entry in self._heap if self._entries.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heap)
@@ -0,0 +1,292 @@
+import logging
+import multiprocessing
+import os
+import zlib
+from itertools import count
+from threading import Event, Lock, Thread
+
+from LogPipeline import ForwardedRecordHandler, LogListener, forward_logging
+from MonitorService import MonitorService
+from NotificationLog import NotificationLog
+
+logger = logging.getLogger(__name__)
+
+
+# Collects a shard's probe results and notifications and ships them to the coordinator in batches,
+# so the inter-process queue sees a few messages per second instead of one per probe
+class _ShardOutbox:
+
+    def __init__(self, shard, queue, flush_interval):
+        self.shard = shard
+        self.queue = queue
+        self.flush_interval = flush_interval
+        self.lock = Lock()
+        self.results = []  # (host, port, is_up, timestamp)
+        self.notifications = []  # (callerId, host, port, is_up, timestamp)
+        self.stopped = Event()
+        self.thread = Thread(target=self.__run, daemon=True)
+        self.thread.start()
+
+    def add_result(self, host, port, is_up, timestamp):
+        with self.lock:
+            self.results.append((host, port, is_up, timestamp))
+
+    def add_notification(self, callerId, host, port, is_up, timestamp):
+        with self.lock:
+            self.notifications.append((callerId, host, port, is_up, timestamp))
+
+    def flush(self):
+        with self.lock:
+            results, self.results = self.results, []
+            notifications, self.notifications = self.notifications, []
+        if results or notifications:
+            self.queue.put(('batch', self.shard, results, notifications))
+
+    def close(self):
+        self.stopped.set()
+        self.thread.join()
+        self.flush()
+
+    def __run(self):
+        while not self.stopped.wait(self.flush_interval):
+            self.flush()
+
+
+# Plugs into MonitorService's notification_log: keeps the shard-local log and forwards every entry
+class _ForwardingNotificationLog(NotificationLog):
+
+    def __init__(self, outbox, max_entries=1000, max_age=None):
+        super().__init__(max_entries, max_age)
+        self.outbox = outbox
+
+    def append(self, callerId, host, port, is_up, timestamp=None):
+        entry = super().append(callerId, host, port, is_up, timestamp)
+        self.outbox.add_notification(callerId, host, port, is_up, entry.timestamp)
+        return entry
+
+
+# Plugs into MonitorService's status_history hook and forwards every probe result
+class _ForwardingStatusHistory:
+
+    def __init__(self, outbox):
+        self.outbox = outbox
+
+    def record(self, key, is_up, timestamp=None):
+        self.outbox.add_result(key[0], key[1], is_up, timestamp)
+
+
+def _shard_main(shard, grace_time, commands, events, logs, log_level, monitor_options, flush_interval):
+    forward_logging(logs, log_level)
+    outbox = _ShardOutbox(shard, events, flush_interval)
+    shutdown_event = Event()
+    monitor = MonitorService(grace_time, shutdown_event, notification_log=_ForwardingNotificationLog(outbox),
+                             status_history=_ForwardingStatusHistory(outbox), **monitor_options)
+    while True:
+        method, args = commands.get()
+        if method == 'shutdown':
+            break
+        try:
+            getattr(monitor, method)(*args)
+        except Exception as exc:
+            logger.error("Shard %s failed to apply %s%s: %s", shard, method, args, exc)
+
+    shutdown_event.set()
+    monitor.join()
+    outbox.close()
+    events.put(('stopped', shard, None, None))
+
+
+# Coordinator that hash-partitions services across worker processes, each running its own MonitorService.
+# It exposes the ConfigService API: registrations, subscriptions and outage changes are routed to the
+# shard owning the service (callers are registered on every shard), and results and notifications
+# flow back over a shared multiprocessing queue into self.statuses, self.logs and self.status_history.
+class ShardedMonitorService:
+
+    def __init__(self, grace_time=10, shards=None, shutdown_event=None, log_max_entries=1000, log_max_age=None,
+                 status_history=None, flush_interval=0.05, **monitor_options):
+        self.grace_time = grace_time
+        self.shard_count = shards or os.cpu_count() or 1
+        self.shutdown_event = shutdown_event or Event()
+        self.lock = Lock()
+        self.services = {}  # key: (host, port), value: owning shard
+        self.callers = {}  # key: callerId, value: name
+        self.statuses = {}  # key: (host, port), value: last probe result
+        self.logs = NotificationLog(log_max_entries, log_max_age)
+        self.status_history = status_history
+        self._window_ids = count(1)  # outage window ids, unique across shards
+
+        self.events = multiprocessing.Queue()
+        self.commands = [multiprocessing.Queue() for _ in range(self.shard_count)]
+        # Shards log through this queue, so their records are written by the parent's handlers
+        self.log_records = multiprocessing.Queue()
+        self.log_listener = LogListener(self.log_records, ForwardedRecordHandler())
+        self.log_listener.start()
+        self.processes = [
+            multiprocessing.Process(target=_shard_main, daemon=True, name=f"monitor-shard-{shard}",
+                                    args=(shard, grace_time, self.commands[shard], self.events, self.log_records,
+                                          logging.getLogger().getEffectiveLevel(), monitor_options, flush_interval))
+            for shard in range(self.shard_count)
+        ]
+        for process in self.processes:
+            process.start()
+        self.collector_thread = Thread(target=self.__collect, daemon=True)
+        self.collector_thread.start()
+        self.shutdown_thread = Thread(target=self.__wait_for_shutdown, daemon=True)
+        self.shutdown_thread.start()
+        logger.info("ShardedMonitorService started with %s shards", self.shard_count)
+
+    def shard_for(self, host, port):
+        return zlib.crc32(f"{host}:{port}".encode()) % self.shard_count
+
+    def register_service(self, host, port):
+        return self.register_services([(host, port)])[0]
+
+    def register_services(self, services):
+        with self.lock:
+            results, batches = [], {}
+            for host, port in services:
+                added = (host, port) not in self.services
+                if added:
+                    shard = self.services[(host, port)] = self.shard_for(host, port)
+                    batches.setdefault(shard, []).append((host, port))
+                results.append(added)
+            for shard, batch in batches.items():
+                self.__send(shard, 'register_services', batch)
+        return results
+
+    def unregister_service(self, host, port):
+        with self.lock:
+            shard = self.services.pop((host, port), None)
+            self.statuses.pop((host, port), None)
+            if shard is not None:
+                self.__send(shard, 'unregister_service', host, port)
+            return shard is not None
+
+    def set_outage_time(self, host, port, start, end):
+        with self.lock:
+            if (host, port) not in self.services:
+                return False
+            self.__send(self.services[(host, port)], 'set_outage_time', host, port, start, end)
+            return True
+
+    def add_outage_window(self, host, port, start, end, every=None, until=None, window_id=None):
+        with self.lock:
+            if (host, port) not in self.services:
+                return None
+            window_id = window_id if window_id is not None else next(self._window_ids)
+            self.__send(self.services[(host, port)], 'add_outage_window', host, port, start, end, every, until,
+                        window_id)
+            return window_id
+
+    def remove_outage_window(self, host, port, window_id):
+        with self.lock:
+            if (host, port) not in self.services:
+                return False
+            self.__send(self.services[(host, port)], 'remove_outage_window', host, port, window_id)
+            return True
+
+    # Group members can live on any shard, so group windows go to every shard
+    def add_group_outage(self, group, start, end, every=None, until=None, window_id=None):
+        with self.lock:
+            window_id = window_id if window_id is not None else next(self._window_ids)
+            for shard in range(self.shard_count):
+                self.__send(shard, 'add_group_outage', group, start, end, every, until, window_id)
+            return window_id
+
+    def remove_group_outage(self, group, window_id):
+        with self.lock:
+            for shard in range(self.shard_count):
+                self.__send(shard, 'remove_group_outage', group, window_id)
+            return True
+
+    def add_to_outage_group(self, group, host, port):
+        with self.lock:
+            if (host, port) not in self.services:
+                return False
+            self.__send(self.services[(host, port)], 'add_to_outage_group', group, host, port)
+            return True
+
+    def remove_from_outage_group(self, group, host, port):
+        with self.lock:
+            if (host, port) in self.services:
+                self.__send(self.services[(host, port)], 'remove_from_outage_group', group, host, port)
+
+    def register_caller(self, name, callerId):
+        return self.register_callers([(name, callerId)])[0]
+
+    def register_callers(self, callers):
+        with self.lock:
+            results, batch = [], []
+            for name, callerId in callers:
+                added = callerId not in self.callers
+                if added:
+                    self.callers[callerId] = name
+                    batch.append((name, callerId))
+                results.append(added)
+            if batch:
+                for shard in range(self.shard_count):
+                    self.__send(shard, 'register_callers', batch)
+        return results
+
+    def unregister_caller(self, callerId):
+        with self.lock:
+            if self.callers.pop(callerId, None) is None:
+                return False
+            for shard in range(self.shard_count):
+                self.__send(shard, 'unregister_caller', callerId)
+            self.logs.remove(callerId)
+            return True
+
+    def subscribe_service(self, host, port, callerId, polling_frequency):
+        return self.subscribe_services([(callerId, host, port, polling_frequency)])[0]
+
+    def subscribe_services(self, subscriptions):
+        with self.lock:
+            results, batches = [], {}
+            for callerId, host, port, polling_frequency in subscriptions:
+                valid = (host, port) in self.services and callerId in self.callers
+                if valid:
+                    batches.setdefault(self.services[(host, port)], []).append((callerId, host, port, polling_frequency))
+                results.append(valid)
+            for shard, batch in batches.items():
+                self.__send(shard, 'subscribe_services', batch)
+        return results
+
+    def unsubscribe_service(self, host, port, callerId):
+        with self.lock:
+            if (host, port) not in self.services or callerId not in self.callers:
+                return False
+            self.__send(self.services[(host, port)], 'unsubscribe_service', host, port, callerId)
+            return True
+
+    def join(self, timeout=None):
+        self.shutdown_thread.join(timeout)
+
+    def __send(self, shard, method, *args):
+        self.commands[shard].put((method, args))
+
+    def __collect(self):
+        running = self.shard_count
+        while running:
+            kind, shard, results, notifications = self.events.get()
+            if kind == 'stopped':
+                running -= 1
+                continue
+            for host, port, is_up, timestamp in results:
+                if (host, port) in self.services:
+                    self.statuses[(host, port)] = is_up
+                    if self.status_history is not None:
+                        self.status_history.record((host, port), is_up, timestamp)
+            for callerId, host, port, is_up, timestamp in notifications:
+                if callerId in self.callers:
+                    self.logs.append(callerId, host, port, is_up, timestamp)
+
+    def __wait_for_shutdown(self):
+        self.shutdown_event.wait()
+        for shard in range(self.shard_count):
+            self.__send(shard, 'shutdown')
+        for process in self.processes:
+            process.join()
+        self.collector_thread.join()
+        self.log_listener.stop()
+        logger.info("ShardedMonitorService stopped")
@@ -0,0 +1,211 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from threading import Lock
+from time import time
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+
+UptimeReport = namedtuple('UptimeReport', ['uptime', 'outages', 'mttr', 'observed_seconds'])
+
+
+# Aggregated history at a fixed bucket width, column-wise in `array` buffers
+class _Buckets:
+    __slots__ = ('width', 'start', 'up_seconds', 'down_seconds', 'outages', 'recoveries', 'recovery_seconds')
+
+    def __init__(self, width):
+        self.width = width
+        self.start = array('d')
+        self.up_seconds = array('d')
+        self.down_seconds = array('d')
+        self.outages = array('L')
+        self.recoveries = array('L')
+        self.recovery_seconds = array('d')
+
+    def __len__(self):
+        return len(self.start)
+
+    def add(self, timestamp, up_seconds, down_seconds, outages, recoveries, recovery_seconds):
+        start = timestamp - timestamp % self.width
+        if self.start and self.start[-1] == start:
+            self.up_seconds[-1] += up_seconds
+            self.down_seconds[-1] += down_seconds
+            self.outages[-1] += outages
+            self.recoveries[-1] += recoveries
+            self.recovery_seconds[-1] += recovery_seconds
+            return
+        self.start.append(start)
+        self.up_seconds.append(up_seconds)
+        self.down_seconds.append(down_seconds)
+        self.outages.append(outages)
+        self.recoveries.append(recoveries)
+        self.recovery_seconds.append(recovery_seconds)
+
+    # Adds a sample lasting `duration` seconds from `timestamp`, spreading its time over every bucket it
+    # spans; outage and recovery counts go to the bucket where it starts
+    def add_span(self, timestamp, duration, is_up, outages, recoveries, recovery_seconds):
+        while True:
+            part = min(duration, timestamp - timestamp % self.width + self.width - timestamp)
+            self.add(timestamp, part if is_up else 0.0, 0.0 if is_up else part, outages, recoveries, recovery_seconds)
+            duration -= part
+            if duration <= 0:
+                return
+            timestamp += part
+            outages, recoveries, recovery_seconds = 0, 0, 0.0
+
+    # Moves every bucket starting before `cutoff` into `target` (or drops it when target is None)
+    def roll_into(self, target, cutoff):
+        count = bisect_left(self.start, cutoff)
+        if count == 0:
+            return
+        if target is not None:
+            for i in range(count):
+                target.add(self.start[i], self.up_seconds[i], self.down_seconds[i], self.outages[i],
+                           self.recoveries[i], self.recovery_seconds[i])
+        for column in (self.start, self.up_seconds, self.down_seconds, self.outages, self.recoveries,
+                       self.recovery_seconds):
+            del column[:count]
+
+    # Time in buckets overlapping [start, end], prorated for buckets only partly inside it, and the
+    # outages and recoveries of buckets starting inside it
+    def totals(self, start, end):
+        first, last = bisect_right(self.start, start - self.width), bisect_left(self.start, end)
+        up, down = sum(self.up_seconds[first:last]), sum(self.down_seconds[first:last])
+        for i in {first, last - 1} if first < last else ():
+            outside = 1 - (min(end, self.start[i] + self.width) - max(start, self.start[i])) / self.width
+            up -= self.up_seconds[i] * outside
+            down -= self.down_seconds[i] * outside
+        first, last = bisect_left(self.start, start), bisect_right(self.start, end)
+        return (up, down, sum(self.outages[first:last]), sum(self.recoveries[first:last]),
+                sum(self.recovery_seconds[first:last]))
+
+
+# Full-resolution samples of one service plus its minute and hour roll-ups.
+# Each sample carries the time until the next sample (its duration), whether it starts an outage and,
+# on recovery, the length of the outage it ends, so every query is a sum over contiguous slices.
+# Durations are clipped to the queried range; in roll-ups they are split across the buckets they span.
+class _ServiceHistory:
+    __slots__ = ('timestamp', 'state', 'duration', 'outage', 'recovery', 'minutes', 'hours', 'outage_started',
+                 'last_rollup')
+
+    def __init__(self):
+        self.timestamp = array('d')
+        self.state = array('b')
+        self.duration = array('d')
+        self.outage = array('b')
+        self.recovery = array('d')
+        self.minutes = _Buckets(MINUTE)
+        self.hours = _Buckets(HOUR)
+        self.outage_started = None  # timestamp of the first down sample of the current outage
+        self.last_rollup = 0.0
+
+    def record(self, timestamp, is_up):
+        if self.timestamp:
+            self.duration[-1] = max(0.0, timestamp - self.timestamp[-1])
+
+        outage, recovery = 0, 0.0
+        if not is_up and self.outage_started is None:
+            outage, self.outage_started = 1, timestamp
+        elif is_up and self.outage_started is not None:
+            recovery, self.outage_started = timestamp - self.outage_started, None
+
+        self.timestamp.append(timestamp)
+        self.state.append(1 if is_up else 0)
+        self.duration.append(0.0)
+        self.outage.append(outage)
+        self.recovery.append(recovery)
+
+    def rollup(self, full_resolution_cutoff, minute_cutoff, hour_cutoff):
+        # The newest sample stays at full resolution: its duration is still open
+        count = min(bisect_left(self.timestamp, full_resolution_cutoff), len(self.timestamp) - 1)
+        if count > 0:
+            for i in range(count):
+                self.minutes.add_span(self.timestamp[i], self.duration[i], self.state[i], self.outage[i],
+                                      1 if self.recovery[i] else 0, self.recovery[i])
+            for column in (self.timestamp, self.state, self.duration, self.outage, self.recovery):
+                del column[:count]
+        self.minutes.roll_into(self.hours, minute_cutoff)
+        if hour_cutoff is not None:
+            self.hours.roll_into(None, hour_cutoff)
+
+    def totals(self, start, end):
+        totals = [0.0, 0.0, 0, 0, 0.0]
+        for level in (self.hours.totals(start, end), self.minutes.totals(start, end), self.__raw_totals(start, end)):
+            for i, value in enumerate(level):
+                totals[i] += value
+        return totals
+
+    def __raw_totals(self, start, end):
+        # Samples overlapping [start, end], including one that started before it; the edge ones are clipped
+        first, last = max(0, bisect_right(self.timestamp, start) - 1), bisect_left(self.timestamp, end)
+        durations = self.duration[first:last]
+        up = sum(duration for state, duration in zip(self.state[first:last], durations) if state)
+        down = sum(durations) - up
+        for i in {first, last - 1} if first < last else ():
+            timestamp, duration = self.timestamp[i], self.duration[i]
+            outside = duration - max(0.0, min(end, timestamp + duration) - max(start, timestamp))
+            if self.state[i]:
+                up -= outside
+            else:
+                down -= outside
+
+        first, last = bisect_left(self.timestamp, start), bisect_right(self.timestamp, end)
+        recoveries = self.recovery[first:last]
+        return (up, down, sum(self.outage[first:last]), sum(1 for recovery in recoveries if recovery),
+                sum(recoveries))
+
+
+# Per-service status history answering uptime / outage count / MTTR questions over any time range.
+# Samples are kept at full resolution for `full_resolution` seconds, then rolled into minute buckets,
+# which are rolled into hour buckets after `minute_retention` seconds and dropped after `hour_retention`.
+class StatusHistory:
+
+    def __init__(self, full_resolution=HOUR, minute_retention=7 * DAY, hour_retention=400 * DAY,
+                 rollup_interval=MINUTE):
+        self.full_resolution = full_resolution
+        self.minute_retention = minute_retention
+        self.hour_retention = hour_retention  # seconds, None keeps hour buckets forever
+        self.rollup_interval = rollup_interval
+        self.lock = Lock()
+        self._histories = {}  # key: (host, port), value: _ServiceHistory
+
+    def record(self, key, is_up, timestamp=None):
+        timestamp = time() if timestamp is None else timestamp
+        with self.lock:
+            history = self._histories.get(key)
+            if history is None:
+                history = self._histories[key] = _ServiceHistory()
+            history.record(timestamp, is_up)
+            if timestamp - history.last_rollup >= self.rollup_interval:
+                history.last_rollup = timestamp
+                history.rollup(timestamp - self.full_resolution, timestamp - self.minute_retention,
+                               timestamp - self.hour_retention if self.hour_retention is not None else None)
+
+    def remove(self, key):
+        with self.lock:
+            self._histories.pop(key, None)
+
+    # Returns {key: UptimeReport} for every requested service with history in [start, end]
+    def report(self, keys, start, end=None):
+        end = time() if end is None else end
+        reports = {}
+        with self.lock:
+            for key in keys:
+                history = self._histories.get(key)
+                if history is None:
+                    continue
+                up, down, outages, recoveries, recovery_seconds = history.totals(start, end)
+                observed = up + down
+                reports[key] = UptimeReport(
+                    uptime=100.0 * up / observed if observed else None,
+                    outages=outages,
+                    mttr=recovery_seconds / recoveries if recoveries else None,
+                    observed_seconds=observed,
+                )
+        return reports
+
+    def uptime(self, key, start, end=None):
+        report = self.report([key], start, end).get(key)
+        return report.uptime if report else None
@@ -1,5 +1,6 @@
 import threading
 import signal
+from LogPipeline import configure_logging
 from MonitorService import MonitorService
 from DummyServices.DummyServicesCreationAndDeletion import PORTS, DummyServiceMain
 
@@ -39,6 +40,7 @@ def shutdown_handler(signum, frame):
 
 
 def main():
+    configure_logging()
     signal.signal(signal.SIGINT, shutdown_handler)
     dummy_service_thread = threading.Thread(target=start_dummy_services)
     dummy_service_thread.start()
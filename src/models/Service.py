@@ -1,101 +1,76 @@
-from datetime import datetime, timedelta
+from models.SubscriberIndex import SubscriberIndex
 
 
 class Service:
     DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
-
-    def __init__(self, host, port):
-        self._host = host
-        self._port = port
-        self._last_checked = datetime.now() - timedelta(minutes=10)
-        self._is_up = False
-        self._outage_start = None
-        self._outage_end = None
-        self._subscribers = set()  # calledId
-
-    # Getter for host
-    @property
-    def host(self):
-        return self._host
-
-    # Setter for host
-    @host.setter
-    def host(self, value):
-        self._host = value
-
-    # Getter for port
-    @property
-    def port(self):
-        return self._port
-
-    # Setter for port
-    @port.setter
-    def port(self, value):
-        self._port = value
-
-    # Getter for is_up
-    @property
-    def is_up(self):
-        return self._is_up
-
-    # Setter for is_up
-    @is_up.setter
-    def is_up(self, value):
-        self._is_up = value
-
-    # Getter for last_checked
-    @property
-    def last_checked(self):
-        return self._last_checked
-
-    # Setter for last_checked
-    @last_checked.setter
-    def last_checked(self, value):
-        self._last_checked = value
-
-    # Getter for outage_start
-    @property
-    def outage_start(self):
-        return self._outage_start
-
-    # Setter for outage_start
-    @outage_start.setter
-    def outage_start(self, value):
-        self._outage_start = value
-
-    # Getter for outage_end
-    @property
-    def outage_end(self):
-        return self._outage_end
-
-    # Setter for outage_end
-    @outage_end.setter
-    def outage_end(self, value):
-        self._outage_end = value
-
-    # Getter for subscribers
-    @property
-    def subscribers(self):
-        return self._subscribers
+    __slots__ = ('host', 'port', 'last_checked', 'is_up', 'outage_start', 'outage_end', 'probe_interval', 'subscribers',
+                 'subscriber_index', 'pending', 'streak', 'flapping', 'transitions')
+
+    def __init__(self, host, port, track_pending=False):
+        self.host = host
+        self.port = port
+        self.last_checked = float('-inf')  # monotonic seconds, never checked yet
+        self.is_up = False
+        self.outage_start = None  # datetime
+        self.outage_end = None  # datetime
+        self.probe_interval = None  # seconds, None while nobody is subscribed (probing paused)
+        self.subscribers = {}  # key: callerId, value: Subscription shared with the Caller
+        self.subscriber_index = SubscriberIndex()  # same subscriptions, bucketed by polling frequency
+        # callerIds that may not have been told the current status yet, in order; only kept when edge-triggered
+        self.pending = {} if track_pending else None
+        self.streak = 0  # consecutive probe results disagreeing with is_up
+        self.flapping = False
+        self.transitions = None  # deque of monotonic times of recent status changes, kept by FlapDetector
 
     # Method to get a single subscriber if exists
     def get_subscriber(self, subscriber):
-        if subscriber in self._subscribers:
+        if subscriber in self.subscribers:
             return subscriber
 
     # Method to add a single subscriber
-    def add_subscriber(self, subscriber):
-        self._subscribers.add(subscriber)
+    def add_subscriber(self, subscriber, subscription=None):
+        self.remove_subscriber(subscriber)
+        self.subscribers[subscriber] = subscription
+        if subscription is not None:
+            self.subscriber_index.add(subscriber, subscription)
+            if self.pending is not None:
+                self.pending[subscriber] = None
 
     # Method to remove a single subscriber
     def remove_subscriber(self, subscriber):
-        if subscriber in self._subscribers:
-            self._subscribers.remove(subscriber)
+        if subscriber in self.subscribers:
+            subscription = self.subscribers.pop(subscriber)
+            if subscription is not None:
+                self.subscriber_index.remove(subscriber, subscription)
+            if self.pending is not None:
+                self.pending.pop(subscriber, None)
+
+    # Subscribers whose polling window has elapsed; they are marked as notified at `now`
+    def take_due_subscribers(self, now):
+        return self.subscriber_index.take_due(now)
+
+    # After a status change every subscriber may be owed a notification; needs track_pending
+    def mark_changed(self):
+        self.pending.update(dict.fromkeys(self.subscribers))
+
+    # Pending subscribers that haven't been told the current status and whose polling window has elapsed;
+    # they are marked as notified at `now`. Costs O(pending) rather than O(subscribers).
+    def take_pending_subscribers(self, now):
+        due = []
+        for callerId in list(self.pending):
+            subscription = self.subscribers.get(callerId)
+            if subscription is None or subscription.last_status == self.is_up:
+                del self.pending[callerId]
+            elif subscription.last_checked <= now - subscription.polling_frequency:
+                del self.pending[callerId]
+                self.subscriber_index.touch(callerId, subscription, now)
+                due.append((callerId, subscription))
+        return due
 
     def __repr__(self):
-        outage_info = f"Outage from {self._outage_start.strftime(Service.DATE_FORMAT)} to {self._outage_end.strftime(Service.DATE_FORMAT)}" if self._outage_start and self._outage_end else "No outage recorded"
-        subscribers_repr = ', '.join([str(subscriber) for subscriber in self._subscribers]) or "No subscribers"
+        outage_info = f"Outage from {self.outage_start.strftime(Service.DATE_FORMAT)} to {self.outage_end.strftime(Service.DATE_FORMAT)}" if self.outage_start and self.outage_end else "No outage recorded"
+        subscribers_repr = ', '.join([str(subscriber) for subscriber in self.subscribers]) or "No subscribers"
         return (
-            f"Service(host={self._host!r}, port={self._port}, is_up={self._is_up}, "
-            f"last_checked={self._last_checked.strftime(Service.DATE_FORMAT)}, {outage_info}, subscribers=[{subscribers_repr}])"
-        )
\ No newline at end of file
+            f"Service(host={self.host!r}, port={self.port}, is_up={self.is_up}, "
+            f"last_checked={self.last_checked:.3f}, {outage_info}, subscribers=[{subscribers_repr}])"
+        )
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+
+
+# Subscribers of one service grouped by polling frequency.
+# Inside a bucket every subscriber shares the same frequency, so keeping it ordered by last_checked
+# also keeps it ordered by due time: finding who is due only touches the front of each bucket.
+class SubscriberIndex:
+    __slots__ = ('_buckets',)
+
+    def __init__(self):
+        self._buckets = {}  # key: polling_frequency, value: OrderedDict of callerId -> Subscription
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self._buckets.values())
+
+    def add(self, callerId, subscription):
+        bucket = self._buckets.setdefault(subscription.polling_frequency, OrderedDict())
+        if not bucket or subscription.last_checked >= next(reversed(bucket.values())).last_checked:
+            bucket[callerId] = subscription
+        elif subscription.last_checked <= next(iter(bucket.values())).last_checked:
+            bucket[callerId] = subscription
+            bucket.move_to_end(callerId, last=False)
+        else:
+            bucket[callerId] = subscription
+            self._buckets[subscription.polling_frequency] = OrderedDict(
+                sorted(bucket.items(), key=lambda item: item[1].last_checked))
+
+    def remove(self, callerId, subscription):
+        bucket = self._buckets.get(subscription.polling_frequency)
+        if bucket is not None and bucket.pop(callerId, None) is not None and not bucket:
+            del self._buckets[subscription.polling_frequency]
+
+    # Marks every subscriber whose polling window has elapsed as notified at `now` and returns them
+    def take_due(self, now):
+        due = []
+        for polling_frequency, bucket in self._buckets.items():
+            cutoff = now - polling_frequency
+            for _ in range(len(bucket)):
+                callerId, subscription = next(iter(bucket.items()))
+                if subscription.last_checked > cutoff:
+                    break
+                bucket.move_to_end(callerId)
+                subscription.last_checked = now
+                due.append((callerId, subscription))
+        return due
+
+    # Marks one subscriber as notified at `now`, which must not precede any other subscriber's last_checked
+    def touch(self, callerId, subscription, now):
+        subscription.last_checked = now
+        self._buckets[subscription.polling_frequency].move_to_end(callerId)
@@ -0,0 +1,12 @@
+class Subscription:
+    # One record per (caller, service) pair, shared by Caller.subscribed and Service.subscribers
+    __slots__ = ('polling_frequency', 'last_checked', 'last_status')
+
+    def __init__(self, polling_frequency, last_checked=None, last_status=None):
+        self.polling_frequency = polling_frequency  # seconds
+        self.last_checked = float('-inf') if last_checked is None else last_checked  # monotonic seconds
+        self.last_status = last_status  # None until the subscriber has been notified once
+
+    def __repr__(self):
+        return (f"Subscription(polling_frequency={self.polling_frequency}, last_checked={self.last_checked:.3f}, "
+                f"last_status={self.last_status})")
@@ -0,0 +1,23 @@
+import unittest
+
+from src.Benchmark import parse_args, run_scenario
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_tiny_scenario(self):
+        args = parse_args(['--warmup', '0.3', '--duration', '1', '--grace-time', '0.2', '--toggle', '1',
+                           '--notification-timeout', '5'])
+        result = run_scenario(2, 1, 2, args)
+
+        self.assertEqual((result['listeners'], result['refusing'], result['subscriptions']), (2, 1, 6))
+        self.assertGreater(result['probes'], 0)
+        self.assertGreater(result['tick_seconds']['count'], 0)
+        self.assertEqual(result['notifications_missed'], 0)
+        latency = result['notification_latency_seconds']
+        self.assertEqual(latency['count'], 1)
+        self.assertGreater(latency['min'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+from datetime import datetime
+from threading import Thread
+
+from src.Clock import RealClock, VirtualClock
+
+
+class TestRealClock(unittest.TestCase):
+
+    def test_next_deadline_is_fixed_rate(self):
+        clock = RealClock()
+        now = clock.monotonic()
+        self.assertEqual(clock.next_deadline(now, 10), now + 10)
+
+    def test_next_deadline_skips_missed_ticks(self):
+        clock = RealClock()
+        deadline = clock.next_deadline(clock.monotonic() - 5.5, 1)
+        self.assertGreater(deadline, clock.monotonic())
+        self.assertLessEqual(deadline - clock.monotonic(), 1)
+
+
+class TestVirtualClock(unittest.TestCase):
+
+    def test_advance(self):
+        clock = VirtualClock(datetime(2024, 1, 1))
+        self.assertEqual(clock.monotonic(), 0)
+        clock.advance(90)
+        self.assertEqual(clock.monotonic(), 90)
+        self.assertEqual(clock.now(), datetime(2024, 1, 1, 0, 1, 30))
+        self.assertEqual(clock.time(), datetime(2024, 1, 1).timestamp() + 90)
+
+    def test_sleep_waits_for_advance(self):
+        clock = VirtualClock()
+        sleeper = Thread(target=clock.sleep, args=(5,))
+        sleeper.start()
+        clock.advance(3)
+        sleeper.join(timeout=0.1)
+        self.assertTrue(sleeper.is_alive())
+        clock.advance(2)
+        sleeper.join(timeout=5)
+        self.assertFalse(sleeper.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,9 +5,15 @@ from unittest.mock import patch
 from src.ConfigService import ConfigService
 
 
+# Message of the last call to a patched logger method, with its lazy %-arguments applied
+def logged(log_method):
+    args = log_method.call_args.args
+    return args[0] % args[1:]
+
+
 class TestConfigService(unittest.TestCase):
 
-    @patch('src.ConfigService.logging')  # Adjust the import path as necessary
+    @patch('src.ConfigService.logger')  # Adjust the import path as necessary
     def test_initialization_values(self, mock_logging):
         grace_time_seconds = 60
         service = ConfigService(grace_time_seconds)
@@ -18,24 +24,24 @@ class TestConfigService(unittest.TestCase):
         self.assertDictEqual(service.services, {}, "Services should be initialized to an empty dictionary.")
         self.assertDictEqual(service.callers, {}, "Callers should be initialized to an empty dictionary.")
 
-    @patch('src.ConfigService.logging')  # Adjust the import path as necessary
+    @patch('src.ConfigService.logger')  # Adjust the import path as necessary
     def test_logging_output_on_initialization(self, mock_logging):
         grace_time_seconds = 60
         ConfigService(grace_time=grace_time_seconds)
 
-        mock_logging.info.assert_called_with(
+        self.assertEqual(logged(mock_logging.info),
             f"ConfigService initialized with grace time: {timedelta(seconds=grace_time_seconds).total_seconds()} seconds")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_register_service_success(self, mock_logging):
         host = "127.0.0.1"
         port = 8080
         self.config_service = ConfigService(60)  # Recreate config_service for isolation
         self.config_service.register_service(host, port)
         self.assertIn((host, port), self.config_service.services, "Service should be registered.")
-        mock_logging.info.assert_called_with(f"Service registered: {host}:{port}")
+        self.assertEqual(logged(mock_logging.info), f"Service registered: {host}:{port}")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_register_service_duplicate(self, mock_logging):
         host = "127.0.0.1"
         port = 8080
@@ -43,9 +49,9 @@ class TestConfigService(unittest.TestCase):
         self.config_service.register_service(host, port)  # First registration
         mock_logging.reset_mock()  # Reset mock to only capture the next call
         self.config_service.register_service(host, port)  # Duplicate registration
-        mock_logging.warning.assert_called_with(f"Service already registered: {host}:{port}")
+        self.assertEqual(logged(mock_logging.warning), f"Service already registered: {host}:{port}")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_unregister_service_success(self, mock_logging):
         host = "127.0.0.1"
         port = 8080
@@ -53,17 +59,17 @@ class TestConfigService(unittest.TestCase):
         self.config_service.register_service(host, port)
         self.config_service.unregister_service(host, port)
         self.assertNotIn((host, port), self.config_service.services, "Service should be unregistered.")
-        mock_logging.info.assert_called_with(f"Service unregistered: {host}:{port}")
+        self.assertEqual(logged(mock_logging.info), f"Service unregistered: {host}:{port}")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_unregister_service_non_existing(self, mock_logging):
         host = "127.0.0.1"
         port = 8080
         self.config_service = ConfigService(60)
         self.config_service.unregister_service(host, port)  # Attempting to unregister a non-existing service
-        mock_logging.warning.assert_called_with(f"Attempted to unregister non-existing service: {host}:{port}")
+        self.assertEqual(logged(mock_logging.warning), f"Attempted to unregister non-existing service: {host}:{port}")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_set_outage_time_success(self, mock_logging):
         host = "127.0.0.1"
         port = 8080
@@ -81,9 +87,9 @@ class TestConfigService(unittest.TestCase):
         self.assertEqual(service.outage_end, end_time, "Outage end time should be set correctly.")
 
         expected_log_message = f"Outage time set for service {host}:{port} from {start_time.strftime(ConfigService.DATE_FORMAT)} to {end_time.strftime(ConfigService.DATE_FORMAT)}"
-        mock_logging.info.assert_called_with(expected_log_message)
+        self.assertEqual(logged(mock_logging.info), expected_log_message)
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_set_outage_time_non_existing_service(self, mock_logging):
         host = "127.0.0.1"
         port = 8080
@@ -94,9 +100,29 @@ class TestConfigService(unittest.TestCase):
 
         self.config_service.set_outage_time(host, port, start_time, end_time)
 
-        mock_logging.warning.assert_called_with(f"Attempted to set outage time for non-existing service: {host}:{port}")
+        self.assertEqual(logged(mock_logging.warning), f"Attempted to set outage time for non-existing service: {host}:{port}")
+
+    @patch('src.ConfigService.logger')
+    def test_outage_windows_and_groups(self, mock_logging):
+        self.config_service = ConfigService(60)
+        self.config_service.register_services([("127.0.0.1", 8080), ("127.0.0.1", 8081)])
+        start_time = datetime.now()
+
+        window_id = self.config_service.add_outage_window("127.0.0.1", 8080, start_time, start_time + timedelta(hours=1))
+        self.config_service.add_group_outage("rack-1", start_time, start_time + timedelta(hours=2),
+                                             every=timedelta(days=1))
+        self.assertTrue(self.config_service.add_to_outage_group("rack-1", "127.0.0.1", 8081))
+        self.assertIsNone(self.config_service.add_outage_window("127.0.0.1", 9999, start_time, start_time))
+
+        outages = self.config_service.outages
+        self.assertEqual(outages.outage_end(("127.0.0.1", 8080), start_time), start_time + timedelta(hours=1))
+        self.assertEqual(outages.outage_end(("127.0.0.1", 8081), start_time + timedelta(days=1)),
+                         start_time + timedelta(days=1, hours=2))
+
+        self.assertTrue(self.config_service.remove_outage_window("127.0.0.1", 8080, window_id))
+        self.assertFalse(outages.in_outage(("127.0.0.1", 8080), start_time))
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_register_caller_success(self, mock_logging):
         name = "John Doe"
         callerId = "123"
@@ -105,9 +131,9 @@ class TestConfigService(unittest.TestCase):
         self.config_service.register_caller(name, callerId)
 
         self.assertIn(callerId, self.config_service.callers, "Caller should be registered.")
-        mock_logging.info.assert_called_with(f"Caller registered: {name} with ID {callerId}")
+        self.assertEqual(logged(mock_logging.info), f"Caller registered: {name} with ID {callerId}")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_register_caller_duplicate(self, mock_logging):
         name = "John Doe"
         callerId = "123"
@@ -116,9 +142,9 @@ class TestConfigService(unittest.TestCase):
         mock_logging.reset_mock()  # Reset mock to only capture the next call
         self.config_service.register_caller(name, callerId)  # Attempt duplicate registration
 
-        mock_logging.warning.assert_called_with(f"Caller already registered with ID {callerId}")
+        self.assertEqual(logged(mock_logging.warning), f"Caller already registered with ID {callerId}")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_unregister_caller_success(self, mock_logging):
         name = "John Doe"
         callerId = "123"
@@ -127,17 +153,17 @@ class TestConfigService(unittest.TestCase):
         self.config_service.unregister_caller(callerId)
 
         self.assertNotIn(callerId, self.config_service.callers, "Caller should be unregistered.")
-        mock_logging.info.assert_called_with(f"Caller unregistered with ID {callerId}")
+        self.assertEqual(logged(mock_logging.info), f"Caller unregistered with ID {callerId}")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_unregister_caller_non_existing(self, mock_logging):
         callerId = "123"
         self.config_service = ConfigService(60)
         self.config_service.unregister_caller(callerId)  # Attempt to unregister non-existing caller
 
-        mock_logging.warning.assert_called_with(f"Attempted to unregister non-existing caller with ID {callerId}")
+        self.assertEqual(logged(mock_logging.warning), f"Attempted to unregister non-existing caller with ID {callerId}")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_subscribe_service_success(self, mock_logging):
         self.config_service = ConfigService(60)  # Assuming grace_time is 60 seconds for initialization
         host, port, callerId, polling_frequency = "127.0.0.1", 8080, "caller123", 30
@@ -150,9 +176,9 @@ class TestConfigService(unittest.TestCase):
         self.assertTrue(result, "Subscription should be successful.")
         self.assertIn(callerId, self.config_service.services[(host, port)].subscribers,
                       "Caller should be added to service's subscribers.")
-        mock_logging.info.assert_called_with(f"Caller {callerId} subscribed to service {host}:{port}")
+        self.assertEqual(logged(mock_logging.info), f"Caller {callerId} subscribed to service {host}:{port}")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_subscribe_service_failure(self, mock_logging):
         self.config_service = ConfigService(60)
         host, port, callerId, polling_frequency = "127.0.0.1", 8080, "caller123", 30
@@ -161,10 +187,10 @@ class TestConfigService(unittest.TestCase):
         result = self.config_service.subscribe_service(host, port, callerId, polling_frequency)
 
         self.assertFalse(result, "Subscription should fail for non-existing service or caller.")
-        mock_logging.warning.assert_called_with(
+        self.assertEqual(logged(mock_logging.warning),
             f"Subscription attempt failed for caller {callerId} to service {host}:{port}")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_unsubscribe_service_success(self, mock_logging):
         self.config_service = ConfigService(60)
         host, port, callerId = "127.0.0.1", 8080, "caller123"
@@ -177,9 +203,9 @@ class TestConfigService(unittest.TestCase):
 
         self.assertNotIn(callerId, self.config_service.services[(host, port)].subscribers,
                          "Caller should be removed from service's subscribers.")
-        mock_logging.info.assert_called_with(f"Caller {callerId} unsubscribed from service {host}:{port}")
+        self.assertEqual(logged(mock_logging.info), f"Caller {callerId} unsubscribed from service {host}:{port}")
 
-    @patch('src.ConfigService.logging')
+    @patch('src.ConfigService.logger')
     def test_unsubscribe_service_failure(self, mock_logging):
         self.config_service = ConfigService(60)
         host, port, callerId = "127.0.0.1", 8080, "caller123"
@@ -187,9 +213,67 @@ class TestConfigService(unittest.TestCase):
 
         self.config_service.unsubscribe_service(host, port, callerId)
 
-        mock_logging.warning.assert_called_with(
+        self.assertEqual(logged(mock_logging.warning),
             f"Unsubscription attempt failed for caller {callerId} to service {host}:{port}")
 
+    @patch('src.ConfigService.logger')
+    def test_probe_interval_follows_subscribers(self, mock_logging):
+        self.config_service = ConfigService(5)
+        host, port = "127.0.0.1", 8080
+        self.config_service.register_service(host, port)
+        self.config_service.register_caller("John Doe", "caller1")
+        self.config_service.register_caller("Jane Doe", "caller2")
+        service = self.config_service.services[(host, port)]
+        self.assertIsNone(service.probe_interval, "Service without subscribers should not be probed.")
+        self.assertNotIn((host, port), self.config_service.scheduler)
+
+        self.config_service.subscribe_service(host, port, "caller1", 30)
+        self.config_service.subscribe_service(host, port, "caller2", 90)
+        self.assertEqual(service.probe_interval, 30)
+        self.assertLessEqual(self.config_service.scheduler.next_due(), self.config_service.clock.monotonic(),
+                             "A newly subscribed service should be checked at once.")
+
+        self.config_service.unsubscribe_service(host, port, "caller1")
+        self.assertEqual(service.probe_interval, 90)
+
+        self.config_service.unregister_caller("caller2")
+        self.assertIsNone(service.probe_interval)
+        self.assertNotIn((host, port), self.config_service.scheduler)
+
+    @patch('src.ConfigService.logger')
+    def test_snapshot_published_copy_on_write(self, mock_logging):
+        self.config_service = ConfigService(60)
+        initial = self.config_service.snapshot
+        self.config_service.register_service("127.0.0.1", 8080)
+        self.config_service.register_caller("John Doe", "caller1")
+
+        snapshot = self.config_service.snapshot
+        self.assertEqual(snapshot.version, initial.version + 2)
+        self.assertEqual(len(initial.services), 0, "Published snapshots should never change.")
+        self.assertIn(("127.0.0.1", 8080), snapshot.services)
+        self.assertIn("caller1", snapshot.callers)
+        with self.assertRaises(TypeError):
+            snapshot.services[("127.0.0.1", 8081)] = None
+
+    @patch('src.ConfigService.logger')
+    def test_bulk_registration_and_subscription(self, mock_logging):
+        self.config_service = ConfigService(5)
+        version = self.config_service.snapshot.version
+
+        self.assertEqual(self.config_service.register_services([("127.0.0.1", 8080), ("127.0.0.1", 8081),
+                                                                ("127.0.0.1", 8080)]), [True, True, False])
+        self.assertEqual(self.config_service.register_callers([("John Doe", "caller1"), ("Jane Doe", "caller2")]),
+                         [True, True])
+        results = self.config_service.subscribe_services([("caller1", "127.0.0.1", 8080, 30),
+                                                          ("caller2", "127.0.0.1", 8080, 10),
+                                                          ("caller3", "127.0.0.1", 8081, 10)])
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(set(self.config_service.services[("127.0.0.1", 8080)].subscribers), {"caller1", "caller2"})
+        self.assertEqual(self.config_service.services[("127.0.0.1", 8080)].probe_interval, 10)
+        self.assertEqual(self.config_service.snapshot.version, version + 2, "One snapshot per registration batch.")
+        self.assertEqual(logged(mock_logging.info), "Bulk subscription: 2 subscribed, 1 failed")
+
 
 if __name__ == '__main__':
     unittest.main()
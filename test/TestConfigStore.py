@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from src.ConfigService import ConfigService
+from src.ConfigStore import SqliteConfigStore
+
+
+class TestSqliteConfigStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'config.db')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @patch('src.ConfigService.logger')
+    def test_warm_start_restores_registry(self, mock_logging):
+        start = datetime(2023, 1, 1, 12, 0)
+        store = SqliteConfigStore(self.path)
+        config_service = ConfigService(5, store)
+        config_service.register_services([("127.0.0.1", 8080), ("127.0.0.1", 8081)])
+        config_service.register_caller("John Doe", "caller1")
+        config_service.register_caller("Jane Doe", "caller2")
+        config_service.subscribe_services([("caller1", "127.0.0.1", 8080, 30), ("caller2", "127.0.0.1", 8081, 10)])
+        config_service.set_outage_time("127.0.0.1", 8080, start, start + timedelta(hours=2))
+        config_service.unregister_caller("caller2")
+        store.close()
+
+        store = SqliteConfigStore(self.path)
+        restored = ConfigService(5, store)
+        store.close()
+
+        self.assertEqual(set(restored.services), {("127.0.0.1", 8080), ("127.0.0.1", 8081)})
+        self.assertEqual(set(restored.callers), {"caller1"})
+        service = restored.services[("127.0.0.1", 8080)]
+        self.assertEqual(set(service.subscribers), {"caller1"})
+        self.assertEqual(service.probe_interval, 30)
+        self.assertEqual((service.outage_start, service.outage_end), (start, start + timedelta(hours=2)))
+        self.assertIsNone(restored.services[("127.0.0.1", 8081)].probe_interval)
+        self.assertIn(("127.0.0.1", 8080), restored.snapshot.services)
+
+    @patch('src.ConfigService.logger')
+    def test_warm_start_restores_outage_windows_and_groups(self, mock_logging):
+        start = datetime(2023, 1, 2, 3, 0)
+        store = SqliteConfigStore(self.path)
+        config_service = ConfigService(5, store)
+        config_service.register_services([("127.0.0.1", 8080), ("127.0.0.1", 8081)])
+        nightly = config_service.add_outage_window("127.0.0.1", 8080, start, start + timedelta(hours=1),
+                                                   every=timedelta(days=1))
+        removed = config_service.add_outage_window("127.0.0.1", 8080, start, start + timedelta(hours=5))
+        config_service.remove_outage_window("127.0.0.1", 8080, removed)
+        config_service.add_group_outage("db", start + timedelta(hours=12), start + timedelta(hours=13))
+        config_service.add_to_outage_group("db", "127.0.0.1", 8081)
+        store.close()
+
+        store = SqliteConfigStore(self.path)
+        restored = ConfigService(5, store)
+
+        outages = restored.outages
+        self.assertTrue(outages.in_outage(("127.0.0.1", 8080), start + timedelta(days=3, minutes=30)))
+        self.assertFalse(outages.in_outage(("127.0.0.1", 8080), start + timedelta(hours=2)))
+        self.assertTrue(outages.in_outage(("127.0.0.1", 8081), start + timedelta(hours=12, minutes=30)))
+        self.assertEqual(outages.members("db"), [("127.0.0.1", 8081)])
+        self.assertNotEqual(restored.add_outage_window("127.0.0.1", 8080, start, start), nightly,
+                            "New window ids must not collide with restored ones.")
+        store.close()
+
+    def test_wal_mode(self):
+        store = SqliteConfigStore(self.path)
+        self.assertEqual(store.connection.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import socket
+import time
+import unittest
+from unittest.mock import patch
+
+from src.DnsCache import DnsCache
+
+
+class TestDnsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dns_cache = DnsCache(ttl=60, negative_ttl=60)
+
+    def tearDown(self):
+        self.dns_cache.close()
+
+    def test_ip_addresses_bypass_cache(self):
+        self.assertEqual(self.dns_cache.resolve('127.0.0.1'), ('127.0.0.1',))
+        self.assertEqual(self.dns_cache.endpoint('::1', 80), ('::1', 80))
+        self.assertEqual(self.dns_cache.endpoint('::ffff:127.0.0.1', 80), ('127.0.0.1', 80))
+
+    @patch('src.DnsCache.socket.getaddrinfo')
+    def test_resolutions_are_cached(self, mock_getaddrinfo):
+        mock_getaddrinfo.return_value = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 0))]
+        self.assertEqual(self.dns_cache.resolve('localhost'), ('127.0.0.1',))
+        self.assertEqual(self.dns_cache.resolve('localhost'), ('127.0.0.1',))
+        self.assertEqual(self.dns_cache.endpoint('localhost', 8011), ('127.0.0.1', 8011))
+        self.assertEqual(mock_getaddrinfo.call_count, 1)
+
+    @patch('src.DnsCache.socket.getaddrinfo')
+    def test_keeps_every_address_and_prefers_ipv4_for_the_key(self, mock_getaddrinfo):
+        mock_getaddrinfo.return_value = [(socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('::1', 0, 0, 0)),
+                                         (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 0)),
+                                         (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('::1', 0, 0, 0))]
+        self.assertEqual(self.dns_cache.resolve('localhost'), ('::1', '127.0.0.1'))
+        self.assertEqual(self.dns_cache.endpoint('localhost', 8011), self.dns_cache.endpoint('127.0.0.1', 8011))
+
+    @patch('src.DnsCache.socket.getaddrinfo')
+    def test_failures_are_cached(self, mock_getaddrinfo):
+        mock_getaddrinfo.side_effect = socket.gaierror('no such host')
+        for _ in range(3):
+            with self.assertRaises(socket.gaierror):
+                self.dns_cache.resolve('missing.invalid')
+        self.assertIsNone(self.dns_cache.cached('missing.invalid'))
+        self.assertEqual(mock_getaddrinfo.call_count, 1)
+
+    @patch('src.DnsCache.socket.getaddrinfo')
+    def test_miss_resolves_in_background(self, mock_getaddrinfo):
+        mock_getaddrinfo.return_value = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 0))]
+        self.assertIsNone(self.dns_cache.endpoint('db.internal', 5432))
+
+        deadline = time.monotonic() + 5
+        while self.dns_cache.endpoint('db.internal', 5432) is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.dns_cache.endpoint('db.internal', 5432), ('10.0.0.1', 5432))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+
+from src.EventLog import EventLogReader, EventLogWriter, service_id
+
+
+class TestEventLog(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append_and_scan_across_segments(self):
+        writer = EventLogWriter(self.directory.name, segment_size=4 * 24, fsync_interval=60)
+        for second in range(10):
+            writer.append(1000 + second, service_id('127.0.0.1', 8080 + second % 2), second % 3 != 0, 0.01)
+        writer.close()
+
+        reader = EventLogReader(self.directory.name)
+        self.assertEqual(len(list(reader.scan())), 10)
+        self.assertEqual([record.timestamp for record in reader.scan(start=1003, end=1006)], [1003, 1004, 1005, 1006])
+
+        records = list(reader.scan(start=1002, host='127.0.0.1', port=8081))
+        self.assertEqual([record.timestamp for record in records], [1003, 1005, 1007, 1009])
+        self.assertEqual([record.is_up for record in records], [False, True, True, False])
+        self.assertAlmostEqual(records[0].latency, 0.01, places=5)
+
+    def test_reopen_appends_to_last_segment(self):
+        writer = EventLogWriter(self.directory.name)
+        writer.append(1000, service_id('127.0.0.1', 8080), True, 0.01)
+        writer.close()
+        writer = EventLogWriter(self.directory.name)
+        writer.append(1001, service_id('127.0.0.1', 8080), False, 0.01)
+        writer.close()
+
+        self.assertEqual([record.is_up for record in EventLogReader(self.directory.name).scan()], [True, False])
+
+    def test_flush_and_repeated_close(self):
+        writer = EventLogWriter(self.directory.name, fsync_interval=60)
+        writer.append(1000, service_id('127.0.0.1', 8080), True, 0.01)
+        writer.flush()
+        self.assertEqual(len(list(EventLogReader(self.directory.name).scan())), 1)
+        writer.close()
+        writer.close()
+        writer.flush()
+
+    def test_timestamps_never_decrease(self):
+        writer = EventLogWriter(self.directory.name)
+        for timestamp in (1000, 1002, 1001, 1003):  # the wall clock stepped back once
+            writer.append(timestamp, service_id('127.0.0.1', 8080), True, 0.01)
+        writer.close()
+
+        reader = EventLogReader(self.directory.name)
+        self.assertEqual([record.timestamp for record in reader.scan()], [1000, 1002, 1002, 1003])
+        self.assertEqual(len(list(reader.scan(start=1002))), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
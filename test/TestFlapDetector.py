@@ -0,0 +1,31 @@
+import unittest
+
+from src.FlapDetector import FlapDetector
+from src.models.Service import Service
+
+
+class TestFlapDetector(unittest.TestCase):
+
+    def test_hysteresis(self):
+        detector = FlapDetector(hysteresis=3)
+        service = Service('127.0.0.1', 8080)
+        self.assertEqual([detector.observe(service, is_up, 0) for is_up in (True, True, False, True, True, True)],
+                         [False, False, False, False, False, True])
+        self.assertTrue(service.is_up)
+
+    def test_flapping_suppresses_and_backs_off(self):
+        detector = FlapDetector(flap_threshold=4, flap_window=100, flap_backoff=4)
+        service = Service('127.0.0.1', 8080)
+        service.probe_interval = 5
+        for now in range(4):
+            detector.observe(service, now % 2 == 0, now)
+        self.assertTrue(service.flapping)
+        self.assertEqual(detector.probe_interval(service), 20)
+
+        detector.observe(service, False, 200)
+        self.assertFalse(service.flapping)
+        self.assertEqual(detector.probe_interval(service), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
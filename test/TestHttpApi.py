@@ -0,0 +1,120 @@
+import json
+import socket
+import unittest
+from http.client import HTTPConnection
+from threading import Event, Thread, Timer
+
+from src.HttpApi import MonitorHttpApi
+from src.MonitorService import MonitorService
+
+
+# Wraps a lock and sets `waiting` as soon as anyone tries to take it
+class ReportingLock:
+
+    def __init__(self, lock):
+        self.lock = lock
+        self.waiting = Event()
+
+    def __enter__(self):
+        self.waiting.set()
+        return self.lock.acquire()
+
+    def __exit__(self, *exc_info):
+        self.lock.release()
+
+
+class TestMonitorHttpApi(unittest.TestCase):
+
+    def setUp(self):
+        self.shutdown_event = Event()
+        self.monitor_service = MonitorService(1, self.shutdown_event)
+        self.api = MonitorHttpApi(self.monitor_service, port=0).start()
+
+    def tearDown(self):
+        self.api.stop()
+        self.shutdown_event.set()
+
+    def request(self, method, path, body=None):
+        connection = HTTPConnection('127.0.0.1', self.api.port, timeout=5)
+        connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                           headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        payload = json.loads(response.read())
+        connection.close()
+        return response.status, payload
+
+    def test_config_endpoints(self):
+        self.assertEqual(self.request('POST', '/services', {'host': '127.0.0.1', 'port': 8080})[0], 201)
+        self.assertEqual(self.request('POST', '/services', {'host': '127.0.0.1', 'port': 8080})[0], 409)
+        self.assertEqual(self.request('POST', '/callers', {'name': 'John Doe', 'callerId': 'caller1'})[0], 201)
+        self.assertEqual(self.request('POST', '/subscriptions', {'host': '127.0.0.1', 'port': 8080,
+                                                                 'callerId': 'caller1', 'polling_frequency': 30})[0], 201)
+        self.assertEqual(self.request('POST', '/subscriptions', {'host': '127.0.0.1', 'port': 8081,
+                                                                 'callerId': 'caller1', 'polling_frequency': 30})[0], 404)
+        self.assertEqual(self.request('GET', '/services'),
+                         (200, [{'host': '127.0.0.1', 'port': 8080, 'is_up': False}]))
+        self.assertEqual(self.request('DELETE', '/callers', {'callerId': 'caller1'})[0], 200)
+        self.assertEqual(self.request('GET', '/callers'), (200, []))
+        self.assertEqual(self.request('POST', '/services', {'host': '127.0.0.1'})[0], 400)
+
+    def test_config_calls_do_not_block_the_event_loop(self):
+        results = []
+        lock = self.monitor_service.lock = ReportingLock(self.monitor_service.lock)
+        lock.lock.acquire()
+        try:
+            registering = Thread(target=lambda: results.append(
+                self.request('POST', '/services', {'host': '127.0.0.1', 'port': 8080})))
+            registering.start()
+            self.assertTrue(lock.waiting.wait(5), "The POST should be blocked on ConfigService.lock by now.")
+            self.assertEqual(self.request('GET', '/callers/caller1/logs?cursor=0&timeout=0'),
+                             (200, {'entries': [], 'cursor': 0}))
+        finally:
+            lock.lock.release()
+        registering.join()
+        self.assertEqual(results[0][0], 201)
+
+    def test_metrics_endpoint(self):
+        connection = HTTPConnection('127.0.0.1', self.api.port, timeout=5)
+        connection.request('GET', '/metrics')
+        response = connection.getresponse()
+        body = response.read().decode()
+        connection.close()
+        self.assertEqual(response.status, 200)
+        self.assertIn('# TYPE monitor_tick_seconds histogram', body)
+        self.assertIn('config_lock_hold_seconds_count', body)
+
+    def test_long_poll_wakes_on_notification(self):
+        Timer(0.2, self.monitor_service.logs.append, args=('caller1', '127.0.0.1', 8080, True)).start()
+        status, payload = self.request('GET', '/callers/caller1/logs?cursor=0&timeout=5')
+        self.assertEqual(status, 200)
+        self.assertEqual([(entry['port'], entry['is_up']) for entry in payload['entries']], [(8080, True)])
+        self.assertEqual(payload['cursor'], 1)
+
+    def test_stream_pushes_notifications(self):
+        with socket.create_connection(('127.0.0.1', self.api.port), timeout=5) as client:
+            client.sendall(b"GET /callers/caller1/stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            received = b''
+            while b': keepalive' not in received:
+                received += client.recv(4096)
+            self.monitor_service.logs.append('caller1', '127.0.0.1', 8080, False)
+            while b'data: ' not in received:
+                received += client.recv(4096)
+        data = received.split(b'data: ', 1)[1].split(b'\n', 1)[0]
+        self.assertEqual(json.loads(data)['is_up'], False)
+
+    def test_stop_with_a_stream_still_open(self):
+        with socket.create_connection(('127.0.0.1', self.api.port), timeout=5) as client:
+            client.sendall(b"GET /callers/caller1/stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            received = b''
+            while b': keepalive' not in received:
+                received += client.recv(4096)
+            stopping = Thread(target=self.api.stop)
+            stopping.start()
+            stopping.join(5)
+            self.assertFalse(stopping.is_alive(), "stop() should not wait for open streams to end.")
+            while client.recv(4096):
+                pass
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import io
+import json
+import logging
+import unittest
+
+from src.LogPipeline import RateLimitFilter, StructuredFormatter, TextFormatter, configure_logging
+
+
+def make_record(msg, *args, level=logging.INFO, name='test', **extra):
+    record = logging.LogRecord(name, level, __file__, 0, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestRateLimitFilter(unittest.TestCase):
+
+    def test_drops_over_burst_and_reports_suppressed(self):
+        rate_filter = RateLimitFilter(rate=0.001, burst=3)
+        passed = [rate_filter.filter(make_record("probe %s", i)) for i in range(10)]
+        self.assertEqual(passed, [True] * 3 + [False] * 7)
+
+        rate_filter._buckets['test'][0] = 1  # refill one token
+        record = make_record("probe %s", 10)
+        self.assertTrue(rate_filter.filter(record))
+        self.assertEqual(record.suppressed, 7)
+
+    def test_categories_are_limited_separately(self):
+        rate_filter = RateLimitFilter(rate=0.001, burst=1)
+        self.assertTrue(rate_filter.filter(make_record("a", category='probe')))
+        self.assertFalse(rate_filter.filter(make_record("a", category='probe')))
+        self.assertTrue(rate_filter.filter(make_record("a", category='config')))
+        self.assertTrue(rate_filter.filter(make_record("a", name='other')))
+
+    def test_errors_always_pass(self):
+        rate_filter = RateLimitFilter(rate=0.001, burst=1)
+        self.assertTrue(all(rate_filter.filter(make_record("failed", level=logging.ERROR)) for _ in range(5)))
+
+
+class TestFormatters(unittest.TestCase):
+
+    def test_structured_formatter(self):
+        record = make_record("Service registered: %s:%s", 'localhost', 8080, category='config')
+        payload = json.loads(StructuredFormatter().format(record))
+        self.assertEqual(payload['message'], "Service registered: localhost:8080")
+        self.assertEqual(payload['template'], "Service registered: %s:%s")
+        self.assertEqual(payload['args'], ['localhost', 8080])
+        self.assertEqual(payload['category'], 'config')
+        self.assertEqual(payload['level'], 'INFO')
+
+    def test_text_formatter_appends_suppressed(self):
+        record = make_record("Service %s is down", 'db', suppressed=4)
+        self.assertEqual(TextFormatter('%(message)s').format(record),
+                         "Service db is down (4 similar messages suppressed)")
+
+
+class TestConfigureLogging(unittest.TestCase):
+
+    def setUp(self):
+        root = logging.getLogger()
+        self.saved = (list(root.handlers), root.level)
+
+    def tearDown(self):
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in self.saved[0]:
+            root.addHandler(handler)
+        root.setLevel(self.saved[1])
+
+    def test_records_are_written_by_the_listener(self):
+        stream = io.StringIO()
+        listener = configure_logging(structured=True, handlers=[logging.StreamHandler(stream)])
+        logging.getLogger('src.ConfigService').info("Caller registered: %s with ID %s", 'Caller 1', 'caller1')
+        logging.getLogger('src.ConfigService').debug("below the level")
+        listener.stop()
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        payload = json.loads(lines[0])
+        self.assertEqual(payload['logger'], 'src.ConfigService')
+        self.assertEqual(payload['message'], "Caller registered: Caller 1 with ID caller1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import urllib.request
+
+from src.Metrics import MetricsRegistry, MetricsServer, TimedLock
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_snapshot(self):
+        probes = self.registry.counter('probes_total', 'Probes')
+        probes.inc()
+        probes.inc(2)
+        latency = self.registry.histogram('latency_seconds', 'Latency', ['outcome'], buckets=(0.1, 1))
+        latency.labels(outcome='up').observe(0.05)
+        latency.labels(outcome='up').observe(0.5)
+        self.registry.gauge('depth', 'Depth', callback=lambda: 7)
+
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot['probes_total'], [{'labels': {}, 'value': 3}])
+        self.assertEqual(snapshot['depth'], [{'labels': {}, 'value': 7}])
+        histogram = snapshot['latency_seconds'][0]
+        self.assertEqual(histogram['labels'], {'outcome': 'up'})
+        self.assertEqual(histogram['value']['buckets'], {0.1: 1, 1: 2, float('inf'): 2})
+        self.assertEqual(histogram['value']['count'], 2)
+
+    def test_remove_labelled_child(self):
+        notifications = self.registry.counter('notifications_total', 'Notifications', ['caller'])
+        notifications.labels(caller='caller1').inc()
+        notifications.labels(caller='caller2').inc()
+        notifications.remove(caller='caller1')
+        notifications.remove(caller='caller3')
+        self.assertEqual(self.registry.snapshot()['notifications_total'], [{'labels': {'caller': 'caller2'}, 'value': 1}])
+
+    def test_registering_twice_returns_same_metric(self):
+        self.assertIs(self.registry.counter('probes_total', 'Probes'), self.registry.counter('probes_total', 'Probes'))
+
+    def test_render_prometheus(self):
+        self.registry.counter('notifications_total', 'Notifications', ['caller']).labels(caller='a"b').inc()
+        self.registry.histogram('tick_seconds', 'Ticks', buckets=(1,)).observe(0.5)
+        text = self.registry.render_prometheus()
+        self.assertIn('# TYPE notifications_total counter\n', text)
+        self.assertIn('notifications_total{caller="a\\"b"} 1\n', text)
+        self.assertIn('tick_seconds_bucket{le="1"} 1\n', text)
+        self.assertIn('tick_seconds_bucket{le="+Inf"} 1\n', text)
+        self.assertIn('tick_seconds_count 1\n', text)
+
+    def test_timed_lock(self):
+        lock = TimedLock(self.registry.histogram('wait', 'Wait'), self.registry.histogram('hold', 'Hold'))
+        with lock:
+            self.assertTrue(lock.locked())
+        self.assertFalse(lock.locked())
+        self.assertEqual(self.registry.snapshot()['hold'][0]['value']['count'], 1)
+
+    def test_metrics_server(self):
+        self.registry.counter('probes_total', 'Probes').inc()
+        server = MetricsServer(self.registry, port=0).start()
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+                self.assertIn('probes_total 1', response.read().decode())
+        finally:
+            server.stop()
+
+
+if __name__ == '__main__':
+    unittest.main()
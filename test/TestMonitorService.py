@@ -1,7 +1,14 @@
+import socket
+import time
 import unittest
 from datetime import datetime
+from threading import Event
+from unittest.mock import patch
 
+from src.Clock import VirtualClock
+from src.DnsCache import DnsCache
 from src.MonitorService import MonitorService
+from src.ProbeEngine import InlineProbeEngine
 
 
 class TestMonitorService(unittest.TestCase):
@@ -14,6 +21,147 @@ class TestMonitorService(unittest.TestCase):
         monitor_service = MonitorService(5)
         self.assertFalse(monitor_service._MonitorService__check_service_status('127.0.0.1', 8080, datetime.now()))
 
+    def test_subscriber_notified_and_shutdown(self):
+        shutdown_event = Event()
+        monitor_service = MonitorService(1, shutdown_event, max_workers=2)
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+            listener.bind(('127.0.0.1', 0))
+            listener.listen()
+            port = listener.getsockname()[1]
+
+            monitor_service.register_service('127.0.0.1', port)
+            monitor_service.register_caller('John Doe', 'caller1')
+            monitor_service.subscribe_service('127.0.0.1', port, 'caller1', polling_frequency=1)
+
+            deadline = time.monotonic() + 5
+            while not monitor_service.logs['caller1'] and time.monotonic() < deadline:
+                time.sleep(0.1)
+
+        self.assertEqual(str(monitor_service.logs['caller1'][0]), f"Service 127.0.0.1:{port} is up")
+        snapshot = monitor_service.metrics.snapshot()
+        self.assertGreaterEqual(snapshot['monitor_probes_submitted_total'][0]['value'], 1)
+        self.assertIn({'caller': 'caller1'}, [sample['labels'] for sample in snapshot['monitor_notifications_total']])
+        shutdown_event.set()
+        monitor_service.join(timeout=5)
+        self.assertFalse(monitor_service.check_thread.is_alive())
+
+
+    def test_services_on_same_endpoint_share_one_probe(self):
+        # A dual-stack resolver lists ::1 before 127.0.0.1 for localhost, while the listener is IPv4 only
+        getaddrinfo = socket.getaddrinfo
+        dual_stack = [(socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('::1', 0, 0, 0)),
+                      (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 0))]
+        resolve = lambda host, *args, **kwargs: dual_stack if host == 'localhost' else getaddrinfo(host, *args, **kwargs)
+        with patch('src.DnsCache.socket.getaddrinfo', side_effect=resolve):
+            shutdown_event = Event()
+            monitor_service = MonitorService(1, shutdown_event, max_workers=2, dns_cache=DnsCache())
+            submit = monitor_service.probe_engine.submit
+            probed = []
+            monitor_service.probe_engine.submit = lambda host, port, time_now: probed.append((host, port)) or submit(host, port, time_now)
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+                listener.bind(('127.0.0.1', 0))
+                listener.listen()
+                port = listener.getsockname()[1]
+                monitor_service.dns_cache.resolve('localhost')
+
+                monitor_service.register_services([('localhost', port), ('127.0.0.1', port)])
+                monitor_service.register_caller('John Doe', 'caller1')
+                monitor_service.subscribe_services([('caller1', '127.0.0.1', port, 1), ('caller1', 'localhost', port, 1)])
+
+                deadline = time.monotonic() + 5
+                while len(monitor_service.logs['caller1']) < 2 and time.monotonic() < deadline:
+                    time.sleep(0.1)
+
+            shutdown_event.set()
+            monitor_service.join(timeout=5)
+        self.assertEqual(sorted((entry.host, entry.is_up) for entry in monitor_service.logs['caller1']),
+                         [('127.0.0.1', True), ('localhost', True)])
+        self.assertEqual(len(probed), 1)
+
+
+    def test_simulated_hour_with_virtual_clock(self):
+        clock = VirtualClock(datetime(2024, 1, 1))
+        # Up for ten minutes, down for ten minutes
+        probe = lambda host, port, time_now: clock.monotonic() // 600 % 2 == 0
+        # Notifications are aged out on the virtual clock too, so a simulated hour keeps all of them
+        monitor_service = MonitorService(1, clock=clock, probe_engine=InlineProbeEngine(probe), start=False,
+                                         edge_triggered=True, log_max_age=3600)
+        monitor_service.register_service('127.0.0.1', 8080)
+        monitor_service.register_caller('John Doe', 'caller1')
+        monitor_service.subscribe_service('127.0.0.1', 8080, 'caller1', polling_frequency=1)
+
+        for _ in range(3600):
+            monitor_service.tick()
+            clock.advance(1)
+        monitor_service.close()
+
+        entries = monitor_service.logs['caller1']
+        self.assertEqual([entry.is_up for entry in entries], [True, False, True, False, True, False])
+        self.assertEqual([entry.timestamp - datetime(2024, 1, 1).timestamp() for entry in entries],
+                         [0, 600, 1200, 1800, 2400, 3000])
+
+    def test_edge_triggered_subscriber_told_after_its_polling_window(self):
+        clock = VirtualClock(datetime(2024, 1, 1))
+        probe = lambda host, port, time_now: clock.monotonic() < 2
+        monitor_service = MonitorService(1, clock=clock, probe_engine=InlineProbeEngine(probe), start=False,
+                                         edge_triggered=True)
+        monitor_service.register_service('127.0.0.1', 8080)
+        for callerId, polling_frequency in (('caller1', 1), ('caller2', 5)):
+            monitor_service.register_caller(callerId, callerId)
+            monitor_service.subscribe_service('127.0.0.1', 8080, callerId, polling_frequency=polling_frequency)
+
+        for _ in range(20):
+            monitor_service.tick()
+            clock.advance(1)
+        monitor_service.close()
+
+        start = datetime(2024, 1, 1).timestamp()
+        for callerId, expected in (('caller1', [(True, 0), (False, 2)]), ('caller2', [(True, 0), (False, 5)])):
+            self.assertEqual([(entry.is_up, entry.timestamp - start) for entry in monitor_service.logs[callerId]],
+                             expected)
+        self.assertEqual(monitor_service.services[('127.0.0.1', 8080)].pending, {})
+
+    def test_one_probe_per_tick_despite_tick_jitter(self):
+        clock = VirtualClock(datetime(2024, 1, 1))
+        probes = []
+        probe = lambda host, port, time_now: probes.append(clock.monotonic()) or True
+        monitor_service = MonitorService(1, clock=clock, probe_engine=InlineProbeEngine(probe), start=False)
+        monitor_service.register_service('127.0.0.1', 8080)
+        monitor_service.register_caller('John Doe', 'caller1')
+        monitor_service.subscribe_service('127.0.0.1', 8080, 'caller1', polling_frequency=1)
+
+        # Ticks start a little after or before their place on the one-second grid
+        for tick in range(100):
+            monitor_service.tick()
+            clock.advance(1.02 if tick % 2 == 0 else 0.98)
+        monitor_service.close()
+
+        self.assertEqual(len(probes), 100)
+        self.assertEqual(len(monitor_service.logs['caller1']), 100)
+
+    def test_unregistered_caller_leaves_no_log_or_series_behind(self):
+        clock = VirtualClock(datetime(2024, 1, 1))
+        monitor_service = MonitorService(1, clock=clock, probe_engine=InlineProbeEngine(lambda *args: True),
+                                         start=False)
+        monitor_service.register_service('127.0.0.1', 8080)
+        for caller in range(10):
+            callerId = f"caller{caller}"
+            monitor_service.register_caller(callerId, callerId)
+            monitor_service.subscribe_service('127.0.0.1', 8080, callerId, polling_frequency=1)
+            monitor_service.tick()
+            clock.advance(1)
+            deadline = time.monotonic() + 5
+            while callerId not in monitor_service.logs and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertIn(callerId, monitor_service.logs)
+            # A notification still queued for the caller when it leaves must not bring its log back
+            monitor_service.dispatcher.submit(callerId, '127.0.0.1', 8080, False)
+            monitor_service.unregister_caller(callerId)
+        monitor_service.close()
+
+        self.assertEqual(repr(monitor_service.logs), "NotificationLog(callers=0, max_entries=1000, max_age=None)")
+        self.assertEqual(monitor_service.metrics.snapshot()['monitor_notifications_total'], [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,69 @@
+import time
+import unittest
+from threading import Event
+
+from src.NotificationDispatcher import (BLOCK, DROP_NEWEST, DROP_OLDEST, NotificationDispatcher, NotificationLogSink,
+                                       NotificationSink)
+from src.NotificationLog import NotificationLog
+
+
+class RecordingSink(NotificationSink):
+
+    def __init__(self, release=None):
+        self.batches = []
+        self.release = release
+
+    def deliver(self, callerId, notifications):
+        if self.release is not None:
+            self.release.wait(5)
+        self.batches.append((callerId, [(n.port, n.is_up) for n in notifications]))
+
+
+class TestNotificationDispatcher(unittest.TestCase):
+
+    def test_batches_per_caller_and_coalesces(self):
+        sink = RecordingSink()
+        log = NotificationLog()
+        dispatcher = NotificationDispatcher([sink, NotificationLogSink(log)], batch_window=60)
+        dispatcher.submit('caller1', '127.0.0.1', 8080, True)
+        dispatcher.submit('caller1', '127.0.0.1', 8081, True)
+        dispatcher.submit('caller1', '127.0.0.1', 8080, False)
+        dispatcher.submit('caller2', '127.0.0.1', 8080, False)
+        dispatcher.close()
+
+        self.assertEqual(sink.batches, [('caller1', [(8081, True), (8080, False)]), ('caller2', [(8080, False)])])
+        self.assertEqual([(entry.port, entry.is_up) for entry in log['caller1']], [(8081, True), (8080, False)])
+
+    def test_slow_sink_drops_instead_of_blocking(self):
+        release = Event()
+        sink = RecordingSink(release)
+        dispatcher = NotificationDispatcher([sink], batch_window=60, max_pending=2, max_batches=1,
+                                            overflow=DROP_NEWEST)
+        started = time.monotonic()
+        for callerId in ('caller1', 'caller2', 'caller3'):
+            dispatcher.submit(callerId, '127.0.0.1', 8080, True)
+        dispatcher.flush()
+        self.assertLess(time.monotonic() - started, 1, "Submitting must never wait on a sink.")
+        self.assertEqual(dispatcher.dropped, 1)
+        release.set()
+        dispatcher.close()
+        self.assertLessEqual(len(sink.batches) + dispatcher.sink_dropped, 2)
+        self.assertGreaterEqual(len(sink.batches), 1)
+
+    def test_per_sink_overflow_policy(self):
+        class BlockingSink(RecordingSink):
+            overflow = BLOCK
+            max_batches = 5
+
+        dispatcher = NotificationDispatcher([RecordingSink(), BlockingSink()], batch_window=60, max_batches=100)
+        self.assertEqual([(worker.overflow, worker.max_batches) for worker in dispatcher.workers],
+                         [(DROP_OLDEST, 100), (BLOCK, 5)])
+        dispatcher.close()
+
+    def test_sink_must_implement_deliver(self):
+        with self.assertRaises(TypeError):
+            NotificationSink()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import time
+import unittest
+from threading import Event, Thread
+
+from src.NotificationLog import NotificationLog
+
+
+class TestNotificationLog(unittest.TestCase):
+
+    def test_read_after_cursor(self):
+        log = NotificationLog()
+        log.append('caller1', '127.0.0.1', 8080, True)
+        log.append('caller1', '127.0.0.1', 8080, False)
+
+        entries, cursor = log.read('caller1')
+        self.assertEqual([str(entry) for entry in entries],
+                         ["Service 127.0.0.1:8080 is up", "Service 127.0.0.1:8080 is down"])
+        self.assertEqual(log.read('caller1', cursor), ([], cursor))
+
+        log.append('caller1', '127.0.0.1', 8081, True)
+        entries, cursor = log.read('caller1', cursor)
+        self.assertEqual([(entry.port, entry.is_up) for entry in entries], [(8081, True)])
+        self.assertEqual(cursor, 3)
+
+    def test_bounded_by_size_and_age(self):
+        log = NotificationLog(max_entries=2)
+        for port in (8080, 8081, 8082):
+            log.append('caller1', '127.0.0.1', port, True)
+        self.assertEqual([entry.port for entry in log['caller1']], [8081, 8082])
+
+        log = NotificationLog(max_age=60)
+        log.append('caller1', '127.0.0.1', 8080, True, timestamp=0)
+        log.append('caller1', '127.0.0.1', 8081, True)
+        self.assertEqual([entry.port for entry in log['caller1']], [8081])
+
+    def test_stream(self):
+        log = NotificationLog()
+        writer = Thread(target=lambda: [log.append('caller1', '127.0.0.1', port, True) for port in (8080, 8081)])
+        writer.start()
+        streamed = [entry.port for entry in log.stream('caller1', timeout=1)]
+        writer.join()
+        self.assertEqual(streamed, [8080, 8081])
+
+    def test_stream_times_out_despite_other_callers(self):
+        log = NotificationLog()
+        stop = Event()
+
+        def other_caller():
+            while not stop.wait(0.05):
+                log.append('caller2', '127.0.0.1', 8080, True)
+
+        writer = Thread(target=other_caller)
+        writer.start()
+        started = time.monotonic()
+        try:
+            self.assertEqual(list(log.stream('caller1', timeout=0.3)), [])
+        finally:
+            stop.set()
+            writer.join()
+        self.assertLess(time.monotonic() - started, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
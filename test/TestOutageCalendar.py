@@ -0,0 +1,59 @@
+import unittest
+from datetime import datetime, timedelta
+
+from src.OutageCalendar import OutageCalendar
+
+
+class TestOutageCalendar(unittest.TestCase):
+
+    def setUp(self):
+        self.calendar = OutageCalendar()
+        self.key = ('127.0.0.1', 8080)
+        self.t0 = datetime(2024, 1, 1, 12, 0)
+
+    def test_many_windows(self):
+        self.calendar.add(self.key, self.t0, self.t0 + timedelta(hours=1))
+        self.calendar.add(self.key, self.t0 + timedelta(minutes=30), self.t0 + timedelta(hours=3))
+        self.calendar.add(self.key, self.t0 + timedelta(hours=5), self.t0 + timedelta(hours=6))
+
+        self.assertIsNone(self.calendar.outage_end(self.key, self.t0 - timedelta(minutes=1)))
+        self.assertEqual(self.calendar.outage_end(self.key, self.t0 + timedelta(minutes=10)), self.t0 + timedelta(hours=1))
+        self.assertEqual(self.calendar.outage_end(self.key, self.t0 + timedelta(minutes=40)), self.t0 + timedelta(hours=3))
+        self.assertEqual(self.calendar.outage_end(self.key, self.t0 + timedelta(hours=2)), self.t0 + timedelta(hours=3))
+        self.assertFalse(self.calendar.in_outage(self.key, self.t0 + timedelta(hours=4)))
+        self.assertTrue(self.calendar.in_outage(self.key, self.t0 + timedelta(hours=5, minutes=30)))
+
+    def test_expired_windows_are_compacted(self):
+        self.calendar.add(self.key, self.t0, self.t0 + timedelta(hours=1))
+        self.calendar.add(self.key, self.t0 + timedelta(hours=2), self.t0 + timedelta(hours=3))
+        self.calendar.outage_end(self.key, self.t0 + timedelta(hours=1, minutes=30))
+        self.assertEqual(len(self.calendar._windows[self.key]), 1)
+        self.calendar.outage_end(self.key, self.t0 + timedelta(hours=4))
+        self.assertNotIn(self.key, self.calendar._windows)
+
+    def test_recurring_window(self):
+        self.calendar.add(self.key, self.t0, self.t0 + timedelta(hours=2), every=timedelta(weeks=1),
+                          until=self.t0 + timedelta(weeks=2))
+        self.assertEqual(self.calendar.outage_end(self.key, self.t0 + timedelta(weeks=1, hours=1)),
+                         self.t0 + timedelta(weeks=1, hours=2))
+        self.assertFalse(self.calendar.in_outage(self.key, self.t0 + timedelta(weeks=1, hours=3)))
+        self.assertFalse(self.calendar.in_outage(self.key, self.t0 + timedelta(weeks=3, hours=1)))
+        self.assertNotIn(self.key, self.calendar._recurring)
+
+    def test_group_window_and_replace_by_id(self):
+        self.calendar.add('rack-1', self.t0, self.t0 + timedelta(hours=1))
+        self.assertFalse(self.calendar.in_outage(self.key, self.t0))
+        self.calendar.join_group('rack-1', self.key)
+        self.assertTrue(self.calendar.in_outage(self.key, self.t0))
+        self.calendar.leave_group('rack-1', self.key)
+        self.assertFalse(self.calendar.in_outage(self.key, self.t0))
+
+        self.calendar.add(self.key, self.t0, self.t0 + timedelta(hours=1), window_id='planned')
+        self.calendar.add(self.key, self.t0 + timedelta(hours=2), self.t0 + timedelta(hours=3), window_id='planned')
+        self.assertFalse(self.calendar.in_outage(self.key, self.t0))
+        self.assertTrue(self.calendar.remove(self.key, 'planned'))
+        self.assertFalse(self.calendar.in_outage(self.key, self.t0 + timedelta(hours=2)))
+
+
+if __name__ == '__main__':
+    unittest.main()
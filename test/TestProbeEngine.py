@@ -0,0 +1,140 @@
+import socket
+import threading
+import unittest
+from datetime import datetime, timedelta
+from threading import Thread
+from unittest.mock import patch
+
+from src.DnsCache import DnsCache
+from src.ProbeEngine import AsyncProbeEngine, ConnectionBudget, tcp_probe
+
+
+class TestAsyncProbeEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = AsyncProbeEngine(timedelta(seconds=1), max_concurrency=10)
+
+    def tearDown(self):
+        self.engine.shutdown()
+
+    def test_check_service_status_success(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+            listener.bind(('127.0.0.1', 0))
+            listener.listen()
+            port = listener.getsockname()[1]
+            future = self.engine.submit('127.0.0.1', port, datetime.now())
+            self.assertTrue(future.result(timeout=5))
+
+    def test_check_service_status_failure(self):
+        future = self.engine.submit('127.0.0.1', 8080, datetime.now())
+        self.assertFalse(future.result(timeout=5))
+
+    def test_tries_every_cached_address(self):
+        dns_cache = DnsCache()
+        engine = AsyncProbeEngine(timedelta(seconds=1), dns_cache=dns_cache)
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+                listener.bind(('127.0.0.1', 0))
+                listener.listen()
+                port = listener.getsockname()[1]
+                with patch.object(dns_cache, 'cached', return_value=('::1', '127.0.0.1')):
+                    self.assertTrue(engine.submit('localhost', port, datetime.now()).result(timeout=5))
+        finally:
+            engine.shutdown()
+            dns_cache.close()
+
+    def test_abortive_close_resets_connection(self):
+        engine = AsyncProbeEngine(timedelta(seconds=1), abortive_close=True)
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+                listener.bind(('127.0.0.1', 0))
+                listener.listen()
+                self.assertTrue(engine.submit('127.0.0.1', listener.getsockname()[1], datetime.now()).result(timeout=5))
+                connection, _ = listener.accept()
+                with connection, self.assertRaises(ConnectionResetError):
+                    connection.recv(1)
+        finally:
+            engine.shutdown()
+
+    def test_exhausted_budget_skips_probe(self):
+        budget = ConnectionBudget(1)
+        budget.acquire()
+        engine = AsyncProbeEngine(timedelta(seconds=0.2), connection_budget=budget)
+        try:
+            self.assertIsNone(engine.submit('127.0.0.1', 8080, datetime.now()).result(timeout=5))
+            self.assertEqual(budget.throttled, 1)
+        finally:
+            engine.shutdown()
+
+    def test_throttled_probes_wait_on_the_event_loop(self):
+        threads_before = set(threading.enumerate())
+        budget = ConnectionBudget(2)
+        engine = AsyncProbeEngine(timedelta(seconds=5), connection_budget=budget)
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+                listener.bind(('127.0.0.1', 0))
+                listener.listen(128)
+                port = listener.getsockname()[1]
+                futures = [engine.submit('127.0.0.1', port, datetime.now()) for _ in range(50)]
+                self.assertEqual([future.result(timeout=10) for future in futures], [True] * 50)
+            self.assertEqual((budget.in_flight, budget.peak), (0, 2))
+            self.assertGreater(budget.throttled, 0)
+            self.assertFalse([thread for thread in set(threading.enumerate()) - threads_before
+                              if thread.name.startswith('asyncio_')],
+                             "Waiting for the budget must not use executor threads.")
+        finally:
+            engine.shutdown()
+
+    def test_probes_queued_for_concurrency_hold_no_budget(self):
+        budget = ConnectionBudget(10)
+        engine = AsyncProbeEngine(timedelta(seconds=5), max_concurrency=1, connection_budget=budget)
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+                listener.bind(('127.0.0.1', 0))
+                listener.listen(128)
+                port = listener.getsockname()[1]
+                futures = [engine.submit('127.0.0.1', port, datetime.now()) for _ in range(20)]
+                self.assertEqual([future.result(timeout=10) for future in futures], [True] * 20)
+            self.assertEqual((budget.peak, budget.throttled), (1, 0))
+        finally:
+            engine.shutdown()
+
+
+class TestTcpProbe(unittest.TestCase):
+
+    def test_abortive_close_resets_connection(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+            listener.bind(('127.0.0.1', 0))
+            listener.listen()
+            self.assertTrue(tcp_probe('127.0.0.1', listener.getsockname()[1], timeout=1, abortive=True))
+
+    def test_falls_back_across_addresses(self):
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+            listener.bind(('127.0.0.1', 0))
+            listener.listen()
+            port = listener.getsockname()[1]
+            # Nothing listens on ::1 (or there is no IPv6 at all), so only the IPv4 address connects
+            self.assertTrue(tcp_probe(('::1', '127.0.0.1'), port, timeout=1))
+        with self.assertRaises(OSError):
+            tcp_probe(('127.0.0.1',), port, timeout=1)
+            connection, _ = listener.accept()
+            with connection, self.assertRaises(ConnectionResetError):
+                connection.recv(1)
+
+    def test_connection_budget_throttles(self):
+        budget = ConnectionBudget(2)
+        self.assertTrue(budget.acquire())
+        self.assertTrue(budget.try_acquire())
+        self.assertFalse(budget.try_acquire())
+        self.assertFalse(budget.acquire(timeout=0.05))
+
+        releaser = Thread(target=budget.release)
+        releaser.start()
+        self.assertTrue(budget.acquire(timeout=5))
+        releaser.join()
+        self.assertEqual((budget.in_flight, budget.peak), (2, 2))
+        self.assertGreaterEqual(budget.throttled, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
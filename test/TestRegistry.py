@@ -0,0 +1,51 @@
+import unittest
+
+from src.Registry import ChunkedMap, RegistrySnapshot
+
+
+class TestChunkedMap(unittest.TestCase):
+
+    def test_updates_share_untouched_buckets(self):
+        source = {port: f"service{port}" for port in range(1000)}
+        first = ChunkedMap.from_dict(source)
+        source[1000] = "service1000"
+        del source[0]
+        second = first.updated([1000, 0], source)
+
+        self.assertEqual(dict(first), {port: f"service{port}" for port in range(1000)}, "Maps never change.")
+        self.assertEqual(dict(second), source)
+        self.assertEqual((len(first), len(second)), (1000, 1000))
+        self.assertNotIn(0, second)
+        self.assertEqual(second.get(1000), "service1000")
+        shared = sum(a is b for a, b in zip(first._buckets, second._buckets))
+        self.assertGreaterEqual(shared, len(first._buckets) - 2)
+
+    def test_grows_buckets_with_size(self):
+        source = {}
+        mapping = ChunkedMap.from_dict(source)
+        for port in range(5000):
+            source[('127.0.0.1', port)] = port
+            mapping = mapping.updated([('127.0.0.1', port)], source)
+
+        self.assertEqual(dict(mapping), source)
+        self.assertGreaterEqual(len(mapping._buckets) ** 2, len(mapping))
+        with self.assertRaises(TypeError):
+            mapping[('127.0.0.1', 1)] = None
+
+
+class TestRegistrySnapshot(unittest.TestCase):
+
+    def test_publish_changed_keys_or_everything(self):
+        services, callers = {('127.0.0.1', 8080): 'a'}, {'caller1': 'John Doe'}
+        snapshot = RegistrySnapshot.publish(RegistrySnapshot.empty(), services, callers)
+        services[('127.0.0.1', 8081)] = 'b'
+        updated = RegistrySnapshot.publish(snapshot, services, callers, [('127.0.0.1', 8081)], ())
+
+        self.assertEqual(updated.version, 2)
+        self.assertEqual(dict(updated.services), services)
+        self.assertIs(updated.callers, snapshot.callers)
+        self.assertNotIn(('127.0.0.1', 8081), snapshot.services)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import unittest
+
+from src.RetryPolicy import RetryPolicy
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_delay_grows_exponentially_and_is_capped(self):
+        policy = RetryPolicy(base_delay=0.1, max_delay=0.5, multiplier=2, jitter=0)
+        self.assertEqual([policy.delay(attempt) for attempt in range(1, 5)], [0.1, 0.2, 0.4, 0.5])
+
+    def test_jitter_stays_within_bounds(self):
+        policy = RetryPolicy(base_delay=1, max_delay=1, jitter=0.5)
+        for _ in range(100):
+            self.assertTrue(0.5 <= policy.delay(1) <= 1)
+
+    def test_backoff_stops_at_attempt_budget_and_grace_window(self):
+        policy = RetryPolicy(base_delay=0.1, max_attempts=3, jitter=0)
+        self.assertEqual(policy.backoff(1, remaining=5), 0.1)
+        self.assertIsNone(policy.backoff(3, remaining=5))
+        self.assertIsNone(policy.backoff(2, remaining=0.1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from src.Scheduler import ServiceScheduler
+
+
+class TestServiceScheduler(unittest.TestCase):
+
+    def test_pop_due_in_deadline_order(self):
+        scheduler = ServiceScheduler()
+        scheduler.schedule(('127.0.0.1', 8082), 20)
+        scheduler.schedule(('127.0.0.1', 8080), 5)
+        scheduler.schedule(('127.0.0.1', 8081), 10)
+
+        self.assertEqual(scheduler.pop_due(10), [('127.0.0.1', 8080), ('127.0.0.1', 8081)])
+        self.assertEqual(scheduler.next_due(), 20)
+        self.assertEqual(len(scheduler), 1)
+
+    def test_reschedule_and_remove(self):
+        scheduler = ServiceScheduler()
+        scheduler.schedule(('127.0.0.1', 8080), 5)
+        scheduler.schedule(('127.0.0.1', 8080), 30)
+        scheduler.schedule(('127.0.0.1', 8081), 5)
+        scheduler.remove(('127.0.0.1', 8081))
+
+        self.assertEqual(scheduler.pop_due(10), [])
+        self.assertNotIn(('127.0.0.1', 8081), scheduler)
+        self.assertEqual(scheduler.pop_due(30), [('127.0.0.1', 8080)])
+
+    def test_pop_due_times(self):
+        scheduler = ServiceScheduler()
+        scheduler.schedule(('127.0.0.1', 8080), 5)
+        scheduler.schedule(('127.0.0.1', 8081), 7.5)
+
+        self.assertEqual(scheduler.pop_due_times(8), [(('127.0.0.1', 8080), 5), (('127.0.0.1', 8081), 7.5)])
+
+
+if __name__ == '__main__':
+    unittest.main()
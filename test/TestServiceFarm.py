@@ -0,0 +1,65 @@
+import socket
+import time
+import unittest
+
+from src.DummyServices.ServiceFarm import ServiceFarm, ScriptedSchedule, score
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def connect(port, timeout=0.3):
+    with socket.create_connection(('127.0.0.1', port), timeout=timeout):
+        return True
+
+
+class TestServiceFarm(unittest.TestCase):
+
+    def test_scripted_schedule(self):
+        port = free_port()
+        schedule = ScriptedSchedule([('up', 0.5), ('down', 0.5), ('blackhole', 0.5), ('up', 5)], repeat=False)
+        farm = ServiceFarm({port: schedule}).start()
+        try:
+            time.sleep(0.2)
+            self.assertTrue(connect(port))
+            time.sleep(0.5)
+            self.assertRaises(ConnectionRefusedError, connect, port)
+            time.sleep(0.5)
+            self.assertRaises(socket.timeout, connect, port)
+            time.sleep(0.5)
+            self.assertTrue(connect(port, timeout=2))
+        finally:
+            farm.stop()
+        self.assertEqual([state for _, _, state in farm.transitions], ['up', 'down', 'blackhole', 'up'])
+
+    def test_blackholes_do_not_stall_the_loop(self):
+        blackholed = [free_port() for _ in range(40)]
+        up = free_port()
+        schedules = {port: ScriptedSchedule([('blackhole', 60)]) for port in blackholed}
+        schedules[up] = ScriptedSchedule([('down', 0.1), ('up', 60)])
+        started = time.monotonic()
+        farm = ServiceFarm(schedules).start()
+        try:
+            deadline = started + 5
+            while farm.state_of(up) != 'up' and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(connect(up))
+            self.assertLess(time.monotonic() - started, 1)
+            self.assertRaises(socket.timeout, connect, blackholed[0])
+        finally:
+            farm.stop()
+
+    def test_score(self):
+        transitions = [(0, 8011, 'up'), (100, 8011, 'down'), (200, 8011, 'slow'), (300, 8011, 'blackhole')]
+        observations = [(5, 8011, True), (103, 8011, False), (150, 8011, True), (210, 8011, True)]
+        result = score(transitions, observations)
+        self.assertEqual((result['changes'], result['detected'], result['missed']), (3, 2, 1))
+        self.assertEqual(result['latency_max'], 10)
+        self.assertEqual(result['accuracy'], 0.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
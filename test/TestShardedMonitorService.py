@@ -0,0 +1,51 @@
+import socket
+import time
+import unittest
+from threading import Event
+
+from src.ShardedMonitorService import ShardedMonitorService
+
+
+class TestShardedMonitorService(unittest.TestCase):
+
+    def test_results_and_notifications_flow_back_from_shards(self):
+        shutdown_event = Event()
+        monitor_service = ShardedMonitorService(1, shards=2, shutdown_event=shutdown_event, max_workers=2)
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as listener:
+            listener.bind(('127.0.0.1', 0))
+            listener.listen()
+            port = listener.getsockname()[1]
+
+            self.assertEqual(monitor_service.register_services([('127.0.0.1', port), ('127.0.0.1', port)]),
+                             [True, False])
+            monitor_service.register_caller('John Doe', 'caller1')
+            self.assertTrue(monitor_service.subscribe_service('127.0.0.1', port, 'caller1', polling_frequency=1))
+            self.assertFalse(monitor_service.subscribe_service('127.0.0.1', port + 1, 'caller1', polling_frequency=1))
+
+            deadline = time.monotonic() + 10
+            while not monitor_service.logs['caller1'] and time.monotonic() < deadline:
+                time.sleep(0.1)
+
+        self.assertEqual(str(monitor_service.logs['caller1'][0]), f"Service 127.0.0.1:{port} is up")
+        self.assertTrue(monitor_service.statuses[('127.0.0.1', port)])
+        shutdown_event.set()
+        monitor_service.join(timeout=10)
+        self.assertFalse(any(process.is_alive() for process in monitor_service.processes))
+
+    def test_shard_logs_are_written_by_the_parent(self):
+        shutdown_event = Event()
+        monitor_service = ShardedMonitorService(1, shards=1, shutdown_event=shutdown_event, max_workers=1)
+        try:
+            with self.assertLogs(level='ERROR') as captured:
+                monitor_service.commands[0].put(('no_such_method', ()))
+                deadline = time.monotonic() + 10
+                while not captured.records and time.monotonic() < deadline:
+                    time.sleep(0.05)
+            self.assertIn("Shard 0 failed to apply no_such_method()", captured.records[0].getMessage())
+        finally:
+            shutdown_event.set()
+            monitor_service.join(timeout=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
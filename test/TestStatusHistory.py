@@ -0,0 +1,64 @@
+import unittest
+
+from src.StatusHistory import StatusHistory
+
+
+class TestStatusHistory(unittest.TestCase):
+
+    def record_pattern(self, history, key, start, pattern, step=10):
+        for i, is_up in enumerate(pattern):
+            history.record(key, is_up, timestamp=start + i * step)
+
+    def test_uptime_outages_and_mttr(self):
+        history = StatusHistory()
+        key = ('127.0.0.1', 8080)
+        # up 30s, down 20s, up 30s, down 10s, up
+        self.record_pattern(history, key, 1000, [True, True, True, False, False, True, True, True, False, True])
+
+        report = history.report([key], start=1000, end=1090)[key]
+        self.assertAlmostEqual(report.uptime, 100 * 60 / 90)
+        self.assertEqual(report.outages, 2)
+        self.assertAlmostEqual(report.mttr, 15)
+
+    def test_rollups_preserve_totals(self):
+        key_a, key_b = ('127.0.0.1', 8080), ('127.0.0.1', 8081)
+        pattern = ([True] * 50 + [False] * 10) * 200
+        raw = StatusHistory(full_resolution=10 ** 9)
+        rolled = StatusHistory(full_resolution=120, minute_retention=3600)
+        for history in (raw, rolled):
+            self.record_pattern(history, key_a, 0, pattern)
+            self.record_pattern(history, key_b, 0, [True] * len(pattern))
+
+        expected = raw.report([key_a, key_b], start=0, end=10 ** 6)
+        actual = rolled.report([key_a, key_b], start=0, end=10 ** 6)
+        self.assertEqual(set(actual), {key_a, key_b})
+        for key in (key_a, key_b):
+            self.assertAlmostEqual(actual[key].uptime, expected[key].uptime)
+            self.assertEqual(actual[key].outages, expected[key].outages)
+            self.assertEqual(actual[key].mttr, expected[key].mttr)
+        self.assertAlmostEqual(actual[key_a].uptime, 100 * 50 / 60, places=1)
+        self.assertLess(len(rolled._histories[key_a].timestamp), 20)
+        self.assertGreater(len(rolled._histories[key_a].hours), 0)
+
+    def test_durations_clipped_to_range(self):
+        history = StatusHistory()
+        key = ('127.0.0.1', 8080)
+        self.record_pattern(history, key, 1000, [True, True, True, False, False, True])
+
+        report = history.report([key], start=1005, end=1045)[key]
+        self.assertAlmostEqual(report.observed_seconds, 40)
+        self.assertAlmostEqual(report.uptime, 100 * 25 / 40)
+
+    def test_rolled_up_durations_clipped_to_range(self):
+        key = ('127.0.0.1', 8080)
+        history = StatusHistory(full_resolution=120, minute_retention=600)
+        self.record_pattern(history, key, 0, ([True] * 50 + [False] * 10) * 17)
+        self.assertGreater(len(history._histories[key].hours), 1)
+
+        report = history.report([key], start=1800, end=4500)[key]
+        self.assertAlmostEqual(report.observed_seconds, 2700)
+        self.assertAlmostEqual(report.uptime, 100 * 50 / 60, delta=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -15,6 +15,15 @@ class TestCaller(unittest.TestCase):
         caller.remove_subscription('127.0.0.1', 8080)
         self.assertNotIn(('127.0.0.1', 8080), caller.subscribed)
 
+    def test_subscription_record(self):
+        caller = Caller('John Doe', 'caller1')
+        subscription = caller.add_subscription('127.0.0.1', 8080, 30)
+        self.assertIs(caller.subscribed[('127.0.0.1', 8080)], subscription)
+        self.assertEqual(subscription.polling_frequency, 30)
+        self.assertFalse(subscription.last_status)
+        with self.assertRaises(AttributeError):
+            caller.nickname = 'JD'
+
 
 if __name__ == '__main__':
     unittest.main()
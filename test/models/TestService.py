@@ -1,6 +1,7 @@
 import unittest
 
 from src.models.Service import Service
+from src.models.Subscription import Subscription
 
 
 class TestService(unittest.TestCase):
@@ -18,6 +19,44 @@ class TestService(unittest.TestCase):
         service.remove_subscriber('caller1')
         self.assertNotIn('caller1', service.subscribers)
 
+    def test_take_due_subscribers(self):
+        service = Service('127.0.0.1', 8080)
+        service.add_subscriber('caller1', Subscription(10, last_checked=100))
+        service.add_subscriber('caller2', Subscription(10, last_checked=95))
+        service.add_subscriber('caller3', Subscription(60, last_checked=100))
+
+        self.assertEqual([callerId for callerId, _ in service.take_due_subscribers(105)], ['caller2'])
+        self.assertEqual([callerId for callerId, _ in service.take_due_subscribers(110)], ['caller1'])
+        self.assertEqual(service.subscribers['caller2'].last_checked, 105)
+
+        service.remove_subscriber('caller1')
+        self.assertEqual([callerId for callerId, _ in service.take_due_subscribers(160)], ['caller2', 'caller3'])
+        self.assertEqual(len(service.subscriber_index), 2)
+
+    def test_pending_only_tracked_when_asked(self):
+        service = Service('127.0.0.1', 8080)
+        service.add_subscriber('caller1', Subscription(10))
+        service.remove_subscriber('caller1')
+        self.assertIsNone(service.pending)
+
+    def test_take_pending_subscribers(self):
+        service = Service('127.0.0.1', 8080, track_pending=True)
+        service.add_subscriber('caller1', Subscription(10, last_checked=100))
+        service.add_subscriber('caller2', Subscription(30, last_checked=100))
+
+        self.assertEqual([callerId for callerId, _ in service.take_pending_subscribers(110)], ['caller1'])
+        service.subscribers['caller1'].last_status = service.is_up
+        self.assertEqual(list(service.pending), ['caller2'])
+        self.assertEqual([callerId for callerId, _ in service.take_pending_subscribers(130)], ['caller2'])
+        service.subscribers['caller2'].last_status = service.is_up
+        self.assertEqual(service.take_pending_subscribers(200), [])
+        self.assertEqual(service.pending, {})
+
+        service.is_up = True
+        service.mark_changed()
+        self.assertEqual([callerId for callerId, _ in service.take_pending_subscribers(200)], ['caller1', 'caller2'])
+        self.assertEqual([callerId for callerId, _ in service.take_due_subscribers(210)], ['caller1'])
+
 
 # This allows the test to be run from the command line
 if __name__ == '__main__':